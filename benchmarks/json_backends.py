@@ -0,0 +1,103 @@
+"""Compare the JSON backends on list pages of products and customers.
+
+Usage::
+
+    $ python benchmarks/json_backends.py --items 1000 --repeat 20
+
+The pages are dumped once with ``ProductListSchema`` and ``CustomerListSchema``
+and then encoded by every installed backend; the best time of each is shown.
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ipet.common.generics.json_backend import BACKENDS  # noqa: E402
+from ipet.ext.customer.models import Customer  # noqa: E402
+from ipet.ext.customer.schemas import CustomerListSchema  # noqa: E402
+from ipet.ext.product.models import Product  # noqa: E402
+from ipet.ext.product.schemas import ProductListSchema  # noqa: E402
+
+
+def page(elements: list) -> dict:
+    """Build a list page, as the paginated resources do."""
+    return {
+        "elements": elements,
+        "current_page": 1,
+        "total_pages": 1,
+        "total_items": len(elements),
+        "count_strategy": "exact",
+    }
+
+
+def payloads(items: int) -> dict:
+    """Dump a page of products and a page of customers.
+
+    Args:
+        items (int): Elements per page.
+
+    Returns:
+        dict: Serialized pages by schema name.
+    """
+    now = datetime(2022, 8, 1, 10, 30)
+    products = [
+        Product(
+            id=index,
+            full_name=f"Macarrão {index}",
+            full_description="Macarrão espaguete nº 8",
+            price=Decimal("9.90"),
+            brand="Vitarela",
+            created_at=now,
+        )
+        for index in range(items)
+    ]
+    customers = [
+        Customer(
+            id=index,
+            cpf=38164206572 + index,
+            full_name=f"Cliente {index}",
+            address="3409 Bergstrom Prairie",
+            created_at=now,
+        )
+        for index in range(items)
+    ]
+    return {
+        "ProductListSchema": {"data": ProductListSchema().dump(page(products))},
+        "CustomerListSchema": {"data": CustomerListSchema().dump(page(customers))},
+    }
+
+
+def main():
+    """Run the benchmark and print one line per schema and backend."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000, help="Elements per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per backend")
+    args = parser.parse_args()
+    for schema, payload in payloads(args.items).items():
+        results = {}
+        for name, build in BACKENDS.items():
+            try:
+                backend = build()
+            except ImportError:
+                print(f"{schema:<20} {name:<8} not installed")
+                continue
+            best = min(
+                timeit.repeat(
+                    lambda: backend.dumps(payload), number=1, repeat=args.repeat
+                )
+            )
+            results[name] = (best, len(backend.dumps(payload)))
+        baseline = results["json"][0]
+        for name, (best, size) in results.items():
+            print(
+                f"{schema:<20} {name:<8} {best * 1000:8.2f} ms"
+                f"  {baseline / best:5.1f}x json  {size} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare the compiled dump functions with marshmallow on list pages.
+
+Usage::
+
+    $ python benchmarks/serializers.py --items 1000 --repeat 20
+
+Pages of products and customers are dumped by each schema and by its
+compiled version; the best time of each is shown.
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ipet.common.generics.compiler import compiled  # noqa: E402
+from ipet.ext.customer.models import Customer  # noqa: E402
+from ipet.ext.customer.schemas import CustomerListSchema  # noqa: E402
+from ipet.ext.product.models import Product  # noqa: E402
+from ipet.ext.product.schemas import ProductListSchema  # noqa: E402
+
+
+def page(elements: list) -> dict:
+    """Build a list page, as the paginated resources do."""
+    return {
+        "elements": elements,
+        "current_page": 1,
+        "total_pages": 1,
+        "total_items": len(elements),
+        "count_strategy": "exact",
+    }
+
+
+def pages(items: int) -> dict:
+    """Build a page of products and a page of customers.
+
+    Args:
+        items (int): Elements per page.
+
+    Returns:
+        dict: Pages by schema class.
+    """
+    now = datetime(2022, 8, 1, 10, 30)
+    products = [
+        Product(
+            id=index,
+            full_name=f"Macarrão {index}",
+            full_description="Macarrão espaguete nº 8",
+            price=Decimal("9.90"),
+            brand="Vitarela",
+            created_at=now,
+        )
+        for index in range(items)
+    ]
+    customers = [
+        Customer(
+            id=index,
+            cpf=38164206572 + index,
+            full_name=f"Cliente {index}",
+            address="3409 Bergstrom Prairie",
+            created_at=now,
+        )
+        for index in range(items)
+    ]
+    return {ProductListSchema: page(products), CustomerListSchema: page(customers)}
+
+
+def main():
+    """Run the benchmark and print one line per schema and serializer."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000, help="Elements per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per serializer")
+    args = parser.parse_args()
+    for ClassSchema, data in pages(args.items).items():
+        schema = compiled(ClassSchema)
+        if schema.dump(data) != schema.schema.dump(data):
+            raise SystemExit(f"{schema.name}: compiled output differs")
+        results = {}
+        for name, serializer in (("marshmallow", schema.schema), ("compiled", schema)):
+            results[name] = min(
+                timeit.repeat(
+                    lambda: serializer.dump(data), number=1, repeat=args.repeat
+                )
+            )
+        baseline = results["marshmallow"]
+        for name, best in results.items():
+            print(
+                f"{schema.name:<20} {name:<12} {best * 1000:8.2f} ms"
+                f"  {baseline / best:5.1f}x marshmallow"
+            )
+
+
+if __name__ == "__main__":
+    main()
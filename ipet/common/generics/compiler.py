@@ -0,0 +1,239 @@
+"""Module that compiles marshmallow schemas into specialized dump functions.
+
+``compiled(ClassSchema)`` generates, once per process, Python code with one
+straight line per field: attribute access, ``data_key`` rename and the
+conversion of the field type. Its output is identical to ``schema.dump``.
+
+Only the serialization of the common field types is compiled (``String``,
+``Integer``, ``Float``, ``DateTime``, ``Raw``, ``Nested`` and ``List``); any
+other field is serialized by marshmallow itself, and schemas with dump hooks
+or a custom accessor are not compiled at all.
+"""
+from functools import lru_cache
+
+from marshmallow import Schema, fields, missing, utils
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+
+NUMBERS = {fields.Integer: "int", fields.Float: "float"}
+
+
+class CompiledSchema:
+    """Dump function of a schema, used in its place for serialization."""
+
+    def __init__(self, schema: Schema) -> None:
+        """Compile a schema.
+
+        Args:
+            schema (Schema): Data schema instance.
+        """
+        self.schema = schema
+        self.name = type(schema).__name__
+        self.compiled = compilable(schema)
+        self._dump_one = (
+            Compiler(schema).build()
+            if self.compiled
+            else lambda obj: schema.dump(obj, many=False)
+        )
+
+    def dump(self, obj, *, many: bool = None):
+        """Serialize an object, as ``Schema.dump`` does.
+
+        Args:
+            obj: The object(s) to serialize.
+            many (bool, optional): Serialize a collection. Defaults to the schema ``many``.
+
+        Returns:
+            Serialized data.
+        """
+        many = self.schema.many if many is None else bool(many)
+        if many:
+            return [self._dump_one(each) for each in obj]
+        return self._dump_one(obj)
+
+
+def compilable(schema: Schema) -> bool:
+    """Check whether a schema can be compiled without changing its output.
+
+    Args:
+        schema (Schema): Data schema instance.
+
+    Returns:
+        bool: Whether the schema is compiled.
+    """
+    cls = type(schema)
+    return (
+        schema.dict_class is dict
+        and not schema._has_processors(PRE_DUMP)
+        and not schema._has_processors(POST_DUMP)
+        and cls.get_attribute is Schema.get_attribute
+        and cls._serialize is Schema._serialize
+        and cls.dump is Schema.dump
+    )
+
+
+class Compiler:
+    """Generator of the source code of a dump function."""
+
+    def __init__(self, schema: Schema) -> None:
+        """Initialize the generator.
+
+        Args:
+            schema (Schema): Data schema instance.
+        """
+        self.schema = schema
+        self.namespace = {
+            "MISSING": missing,
+            "text": utils.ensure_text_type,
+            "get_attribute": schema.get_attribute,
+        }
+
+    def constant(self, value) -> str:
+        """Add a value to the namespace of the generated code.
+
+        Args:
+            value: Any object.
+
+        Returns:
+            str: Name of the value in the generated code.
+        """
+        name = f"c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def expression(self, field: fields.Field, value: str):
+        """Build the expression that serializes a value, as the field does.
+
+        Args:
+            field (Field): Schema field.
+            value (str): Name of the value in the generated code.
+
+        Returns:
+            str: Python expression, or None when the field type is not compiled.
+        """
+        kind = type(field)
+        if kind is fields.String:
+            converted = f"({value} if {value}.__class__ is str else text({value}))"
+        elif kind in NUMBERS:
+            converted = f"{NUMBERS[kind]}({value})"
+            if field.as_string:
+                converted = f"str({converted})"
+        elif kind is fields.DateTime:
+            data_format = field.format or field.DEFAULT_FORMAT
+            format_func = field.SERIALIZATION_FUNCS.get(data_format)
+            converted = (
+                f"{self.constant(format_func)}({value})"
+                if format_func
+                else f"{value}.strftime({data_format!r})"
+            )
+        elif kind is fields.Raw:
+            return value
+        elif kind is fields.Nested:
+            nested = field.schema
+            dump = self.constant(CompiledSchema(nested)._dump_one)
+            if nested.many or field.many:
+                converted = f"[{dump}(each) for each in {value}]"
+            else:
+                converted = f"{dump}({value})"
+        elif kind is fields.List:
+            inner = self.expression(field.inner, "each")
+            if inner is None:
+                return None
+            converted = f"[{inner} for each in {value}]"
+        else:
+            return None
+        return f"(None if {value} is None else {converted})"
+
+    def field_lines(self, name: str, field: fields.Field, source: str) -> list:
+        """Build the lines that serialize a field into ``result``.
+
+        Args:
+            name (str): Field name in the schema.
+            field (Field): Schema field.
+            source (str): "dict" or "object", the kind of value being dumped.
+
+        Returns:
+            list: Lines of Python code.
+        """
+        key = field.data_key if field.data_key is not None else name
+        attribute = field.attribute or name
+        expression = self.expression(field, "value")
+        if (
+            expression is None
+            or "." in attribute
+            or field.dump_default is not missing
+            or type(field).serialize is not fields.Field.serialize
+            or type(field).get_value is not fields.Field.get_value
+        ):
+            field_name = self.constant(field)
+            return [
+                f"    value = {field_name}.serialize({name!r}, obj, accessor=get_attribute)",
+                "    if value is not MISSING:",
+                f"        result[{key!r}] = value",
+            ]
+        if source == "dict":
+            access = (
+                f"obj[{attribute!r}] if {attribute!r} in obj "
+                f"else getattr(obj, {attribute!r}, MISSING)"
+            )
+        else:
+            access = f"getattr(obj, {attribute!r}, MISSING)"
+        return [
+            f"    value = {access}",
+            "    if value is not MISSING:",
+            f"        result[{key!r}] = {expression}",
+        ]
+
+    def function(self, name: str, source: str) -> str:
+        """Build the source code of the dump function of one kind of value.
+
+        Args:
+            name (str): Function name.
+            source (str): "dict" or "object".
+
+        Returns:
+            str: Function source code.
+        """
+        lines = [f"def {name}(obj):", "    result = {}"]
+        for field_name, field in self.schema.dump_fields.items():
+            lines.extend(self.field_lines(field_name, field, source))
+        lines.append("    return result")
+        return "\n".join(lines)
+
+    def build(self):
+        """Compile the dump function.
+
+        Dictionaries are read by key and other objects by attribute, as
+        marshmallow does; other mappings go through the schema itself.
+
+        Returns:
+            Function that serializes one object.
+        """
+        source = "\n\n".join(
+            (
+                self.function("dump_dict", "dict"),
+                self.function("dump_object", "object"),
+                "def dump(obj):\n"
+                "    if obj.__class__ is dict:\n"
+                "        return dump_dict(obj)\n"
+                "    if hasattr(obj, '__getitem__'):\n"
+                "        return schema_dump(obj)\n"
+                "    return dump_object(obj)",
+            )
+        )
+        self.namespace["schema_dump"] = self.schema.dump
+        filename = f"<compiled {type(self.schema).__name__}>"
+        exec(compile(source, filename, "exec"), self.namespace)
+        return self.namespace["dump"]
+
+
+@lru_cache(maxsize=None)
+def compiled(ClassSchema) -> CompiledSchema:
+    """Return the compiled schema of a schema class, built once per process.
+
+    Args:
+        ClassSchema: Data schema class, instantiated without arguments.
+
+    Returns:
+        CompiledSchema: Compiled schema.
+    """
+    return CompiledSchema(ClassSchema())
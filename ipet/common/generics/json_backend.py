@@ -0,0 +1,210 @@
+"""Module with the pluggable JSON backend of the responses and request bodies.
+
+``JSON_BACKEND`` picks ``orjson``, ``ujson`` or ``json`` (the standard
+library); ``auto`` takes the first one installed, in that order. Every
+backend encodes ``datetime``, ``date``, ``time``, ``Decimal`` (as a string,
+keeping its precision, except ujson, which writes it as a number), ``UUID``
+and dataclasses, and writes UTF-8 without escaping.
+
+Response bodies holding a list of at least ``JSON_STREAM_THRESHOLD`` items are
+encoded and sent in chunks, so the whole body is never held in memory.
+"""
+import dataclasses
+import importlib.util
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from flask import Flask, Request, current_app
+
+from ipet.common.generics.stream import buffered
+
+AUTO = "auto"
+PREFERENCE = ("orjson", "ujson", "json")
+STREAM_BATCH = 500
+
+
+def default(value):
+    """Encode the values the JSON backends do not know.
+
+    Args:
+        value: Value to be encoded.
+
+    Raises:
+        TypeError: The value has no JSON representation.
+
+    Returns:
+        JSON compatible value.
+    """
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSONBackend:
+    """JSON encoder and decoder of one library."""
+
+    def __init__(self, name: str, dumps, loads) -> None:
+        """Initialize the backend.
+
+        Args:
+            name (str): Library name.
+            dumps: Function that encodes a value to bytes.
+            loads: Function that decodes bytes or text.
+        """
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+
+def orjson_backend() -> JSONBackend:
+    """Build the orjson backend, which encodes dataclasses and dates natively."""
+    import orjson
+
+    return JSONBackend(
+        "orjson",
+        lambda value: orjson.dumps(
+            value, default=default, option=orjson.OPT_NON_STR_KEYS
+        ),
+        orjson.loads,
+    )
+
+
+def ujson_backend() -> JSONBackend:
+    """Build the ujson backend."""
+    import ujson
+
+    return JSONBackend(
+        "ujson",
+        lambda value: ujson.dumps(
+            value, default=default, ensure_ascii=False, escape_forward_slashes=False
+        ).encode(),
+        ujson.loads,
+    )
+
+
+def stdlib_backend() -> JSONBackend:
+    """Build the standard library backend."""
+    encoder = json.JSONEncoder(
+        default=default, ensure_ascii=False, separators=(",", ":")
+    )
+    return JSONBackend("json", lambda value: encoder.encode(value).encode(), json.loads)
+
+
+BACKENDS = {"orjson": orjson_backend, "ujson": ujson_backend, "json": stdlib_backend}
+
+
+def load_backend(name: str = AUTO) -> JSONBackend:
+    """Build a JSON backend.
+
+    Args:
+        name (str, optional): "auto", "orjson", "ujson" or "json". Defaults to "auto".
+
+    Raises:
+        ImportError: The chosen library is not installed.
+
+    Returns:
+        JSONBackend: JSON backend.
+    """
+    if name != AUTO:
+        return BACKENDS[name]()
+    for candidate in PREFERENCE:
+        if importlib.util.find_spec(candidate):
+            return BACKENDS[candidate]()
+    return stdlib_backend()
+
+
+def get_backend() -> JSONBackend:
+    """Return the JSON backend of the current application."""
+    return current_app.extensions["json_backend"]
+
+
+class JSONRequest(Request):
+    """Request whose JSON body is decoded by the JSON backend."""
+
+    @property
+    def json_module(self):
+        """Return the JSON backend, used by ``get_json``."""
+        return get_backend()
+
+
+def largest_list(data) -> int:
+    """Return the length of the largest list of a response body.
+
+    Args:
+        data: Response body.
+
+    Returns:
+        int: Number of items.
+    """
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        return max((largest_list(value) for value in data.values()), default=0)
+    return 0
+
+
+def iter_json(data, backend: JSONBackend, threshold: int):
+    """Encode a response body piece by piece, splitting its large lists in batches.
+
+    Args:
+        data: Response body.
+        backend (JSONBackend): JSON backend.
+        threshold (int): Lists with at least this many items are split.
+
+    Yields:
+        bytes: JSON fragment.
+    """
+    if isinstance(data, list) and len(data) >= threshold:
+        yield b"["
+        for start in range(0, len(data), STREAM_BATCH):
+            batch = backend.dumps(data[start : start + STREAM_BATCH])[1:-1]
+            yield b"," + batch if start else batch
+        yield b"]"
+    elif isinstance(data, dict) and largest_list(data) >= threshold:
+        yield b"{"
+        for position, (key, value) in enumerate(data.items()):
+            yield (b"," if position else b"") + backend.dumps(str(key)) + b":"
+            yield from iter_json(value, backend, threshold)
+        yield b"}"
+    else:
+        yield backend.dumps(data)
+
+
+def output_json(data, code: int, headers: dict = None):
+    """Make a flask-restful response with the body encoded by the JSON backend.
+
+    Args:
+        data: Response body.
+        code (int): Status code.
+        headers (dict, optional): Response headers. Defaults to None.
+
+    Returns:
+        Response: JSON response, streamed when the body holds a large list.
+    """
+    backend = get_backend()
+    threshold = current_app.config.get("JSON_STREAM_THRESHOLD", 0)
+    if threshold and largest_list(data) >= threshold:
+        body = buffered(iter_json(data, backend, threshold))
+    else:
+        body = backend.dumps(data) + b"\n"
+    response = current_app.response_class(
+        body, status=code, mimetype="application/json"
+    )
+    response.headers.extend(headers or {})
+    return response
+
+
+def init_app(app: Flask):
+    """Load the JSON backend and decode the request bodies with it.
+
+    Args:
+        app (Flask): Aplication instance.
+    """
+    app.extensions["json_backend"] = load_backend(app.config.get("JSON_BACKEND", AUTO))
+    app.request_class = JSONRequest
@@ -1,19 +1,71 @@
 """Module that creates generic classes to be used in CRUD routines."""
-from http.client import CREATED
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from http.client import BAD_REQUEST, CREATED, MULTI_STATUS, OK
+from math import ceil
 
-from flask import request
+from flask import current_app, request, stream_with_context
 from marshmallow.exceptions import ValidationError
+from sqlalchemy import inspect
 from werkzeug.exceptions import BadRequest, NotFound
 
+from ipet.common.generics import stream
+from ipet.common.generics.compiler import compiled
+from ipet.common.generics.json_backend import get_backend
+from ipet.ext.db import counting, search
+from ipet.ext.db.cache import EntityCache, conditional_response
+from ipet.ext.db.loading import element_schema, loader_options
 from ipet.ext.db.mixins import ManagementMixin
+from ipet.ext.instrumentation.metrics import serialization_timer
+from ipet.ext.libs.ma_schemas import BatchQuerySchema
 
 
-def find_by_id(id, ClassModel):
+def encode_cursor(value) -> str:
+    """Build an opaque keyset cursor.
+
+    Args:
+        value: Value of the ordering column of the last element sent.
+
+    Returns:
+        str: URL safe cursor.
+    """
+    return urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def decode_cursor(cursor: str, column=None):
+    """Read the value of an opaque keyset cursor.
+
+    Args:
+        cursor (str): Cursor built by ``encode_cursor``.
+        column (optional): Ordering column, whose type the value must have. Defaults to None.
+
+    Raises:
+        BadRequest: Malformed cursor, or a value of another type than the column.
+
+    Returns:
+        Value of the ordering column of the last element sent.
+    """
+    try:
+        value = json.loads(urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise BadRequest({"cursor": ["Invalid cursor"]})
+    if column is not None:
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = (str, int, float)
+        if isinstance(value, bool) or not isinstance(value, python_type):
+            raise BadRequest({"cursor": ["Invalid cursor"]})
+    return value
+
+
+def find_by_id(id, ClassModel, ClassSchema=None):
     """Take, from a generic model, an element.
 
     Args:
         id (int): Element identifier.
         ClassModel: Data model class.
+        ClassSchema (optional): Data schema class whose nested fields are eager loaded. Defaults to None.
 
     Raises:
         NotFound: No element was found with the ID.
@@ -21,7 +73,10 @@ def find_by_id(id, ClassModel):
     Returns:
         Model instance.
     """
-    element = ClassModel.query.get(id)
+    query = ClassModel.query
+    if ClassSchema is not None:
+        query = query.options(*loader_options(ClassModel, ClassSchema()))
+    element = query.get(id)
     if element:
         return element
     raise NotFound("Element not found")
@@ -48,13 +103,97 @@ def update(
     element = find_by_id(id, ClassModel)
     json_data = request.get_json()
     try:
-        schema = ClassSchema()
-        schema.context = {"custom_validate": False}
-        schema.load(json_data, instance=element, partial=partial)
+        ClassSchema().load(json_data, instance=element, partial=partial)
         ManagementMixin.save_element(element, error_msg)
     except ValidationError as error:
         raise BadRequest(error.messages)
-    return {"data": schema.dump(element)}
+    schema = compiled(ClassSchema)
+    with serialization_timer(schema):
+        return {"data": schema.dump(element)}
+
+
+def read_batch() -> list:
+    """Read the elements of a batch, sent as a JSON array or as NDJSON.
+
+    Raises:
+        BadRequest: Malformed body or more elements than ``BATCH_MAX_SIZE``.
+
+    Returns:
+        list: Elements sent.
+    """
+    if request.mimetype == "application/x-ndjson":
+        try:
+            items = [
+                get_backend().loads(line)
+                for line in request.get_data(as_text=True).splitlines()
+                if line.strip()
+            ]
+        except ValueError:
+            raise BadRequest({"_schema": ["Invalid NDJSON"]})
+    else:
+        items = request.get_json()
+    if not isinstance(items, list):
+        raise BadRequest({"_schema": ["A list of elements is expected"]})
+    max_size = current_app.config.get("BATCH_MAX_SIZE", 1000)
+    if len(items) > max_size:
+        raise BadRequest({"_schema": [f"At most {max_size} elements per batch"]})
+    return items
+
+
+def read_batch_mode() -> bool:
+    """Read the batch mode sent in the query params.
+
+    Raises:
+        BadRequest: Error in validating sent data.
+
+    Returns:
+        bool: Whether the batch is all-or-nothing.
+    """
+    try:
+        return BatchQuerySchema().load(request.args)["mode"] == "atomic"
+    except ValidationError as error:
+        raise BadRequest(error.messages)
+
+
+def save_batch(ClassModel, elements: dict, errors: dict, atomic: bool, status: int):
+    """Check the uniqueness of a batch with set-based queries and save it in one transaction.
+
+    Args:
+        ClassModel: Data model class.
+        elements (dict): Loaded elements, by batch index.
+        errors (dict): Validation messages of the rejected elements, by batch index.
+        atomic (bool): Save every element or none.
+        status (int): HTTP status of each saved element.
+
+    Raises:
+        BadRequest: Some element was rejected in an atomic batch.
+
+    Returns:
+        Result of each element, by batch index, and the HTTP status of the batch.
+    """
+    errors.update(ClassModel.find_conflicts(elements))
+    if atomic and errors:
+        ManagementMixin.discard_changes(*elements.values())
+        raise BadRequest(errors)
+    ManagementMixin.discard_changes(
+        *(element for index, element in elements.items() if index in errors)
+    )
+    valid = {index: elements[index] for index in elements if index not in errors}
+    if atomic:
+        ManagementMixin.save_all(list(valid.values()))
+    else:
+        errors.update(ManagementMixin.save_each(valid))
+    results = [
+        {"index": index, "status": BAD_REQUEST, "errors": errors[index]}
+        if index in errors
+        else {
+            "index": index,
+            "status": status,
+            "id": inspect(elements[index]).identity[0],
+        }
+        for index in sorted({*elements, *errors})
+    ]
+    return {"data": results}, MULTI_STATUS if errors else status
 
 
 class PostResource:
@@ -62,11 +201,14 @@ class PostResource:
 
     def __init__(self) -> None:
         """Properties to be overwritten."""
+        self.ClassModel = None
         self.ClassSchema = None
 
     def post(self, error_msg: str = None):
         """Save an element, based on generic schema.
 
+        Uniqueness is enforced by the database constraints, in the insert itself.
+
         Args:
             error_msg (str, optional): Error message to be reported. Defaults to None.
 
@@ -78,13 +220,13 @@ class PostResource:
         """
         json_data = request.get_json()
         try:
-            schema = self.ClassSchema()
-            schema.context = {"custom_validate": True}
-            element = schema.load(json_data)
+            element = self.ClassSchema().load(json_data)
         except ValidationError as error:
             raise BadRequest(error.messages)
-        ManagementMixin.save_element(element, error_msg)
-        return {"data": schema.dump(element)}, CREATED
+        self.ClassModel.insert_element(element, error_msg)
+        schema = compiled(self.ClassSchema)
+        with serialization_timer(schema):
+            return {"data": schema.dump(element)}, CREATED
 
 
 class PatchResource:
@@ -136,7 +278,10 @@ class GetResorce:
         self.ClassSchema = None
 
     def get(self, id: int):
-        """Get information from an element.
+        """Get information from an element, read through the entity cache.
+
+        The response carries an ETag and is answered with 304 when it matches
+        ``If-None-Match``.
 
         Args:
             id (int): Element identifier.
@@ -144,8 +289,15 @@ class GetResorce:
         Returns:
             Serialized element.
         """
-        element = find_by_id(id, self.ClassModel)
-        return {"data": self.ClassSchema().dump(element)}
+        body = EntityCache.get(self.ClassModel, id)
+        if body is None:
+            version = EntityCache.version(self.ClassModel, id)
+            element = find_by_id(id, self.ClassModel, self.ClassSchema)
+            schema = compiled(self.ClassSchema)
+            with serialization_timer(schema):
+                body = get_backend().dumps({"data": schema.dump(element)})
+            EntityCache.set(self.ClassModel, id, body, version)
+        return conditional_response(body)
 
 
 class DeleteResorce:
@@ -179,10 +331,135 @@ class GetListResorce:
         self.QuerySchema = None
         self.filter = {}
         self.order_by = None
+        self.count_strategy = None
+        self.search_backend = None
+        self.rank = []
+
+    def filter_query(self, query, req_schema: dict):
+        """Apply the filters sent in the query params, with the resource search backend.
+
+        Relevance orderings of the backend are kept in ``self.rank``. Terms are
+        stripped, and blank ones apply no filter.
+
+        Args:
+            query: SQLAlchemy query base.
+            req_schema (dict): Validated query params.
+
+        Returns:
+            Filtered query.
+        """
+        backend = self.search_backend or current_app.config.get(
+            "SEARCH_BACKEND", search.ILIKE
+        )
+        self.rank = []
+        for key, field in self.filter.items():
+            term = (req_schema.get(key) or "").strip()
+            if term:
+                query = query.filter(search.condition(field, term, backend))
+                self.rank += search.rank(field, term, backend)
+        return query
+
+    @staticmethod
+    def eager_load(query, schema):
+        """Eager load the relationships serialized by the nested fields of a schema.
+
+        Args:
+            query: SQLAlchemy query.
+            schema: Data schema instance of the elements.
+
+        Returns:
+            Query with loader options.
+        """
+        Model = query.column_descriptions[0]["entity"]
+        return query.options(*loader_options(Model, schema))
+
+    def count(self, query, per_page: int) -> dict:
+        """Count the elements of a query, with the resource count strategy.
+
+        Args:
+            query: Filtered query.
+            per_page (int): Elements per page.
+
+        Returns:
+            dict: Totals of items and pages, and the strategy used.
+        """
+        strategy = self.count_strategy or current_app.config.get(
+            "PAGINATION_COUNT_STRATEGY", counting.EXACT
+        )
+        filtered = query.whereclause is not None
+        total, strategy = counting.count(query, strategy, filtered)
+        return {
+            "total_items": total,
+            "total_pages": ceil(total / per_page),
+            "count_strategy": strategy,
+        }
+
+    def paginate(self, query, page: int, per_page: int) -> dict:
+        """Take a page of elements by page number (OFFSET/LIMIT), with total count.
+
+        Args:
+            query: Filtered query.
+            page (int): Page number.
+            per_page (int): Elements per page.
+
+        Raises:
+            NotFound: Page beyond the last one.
+
+        Returns:
+            dict: Page data, to be serialized by the list schema.
+        """
+        elements = (
+            self.eager_load(query, element_schema(self.ClassSchemaList()))
+            .order_by(*self.rank, self.order_by)
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+            .all()
+        )
+        if not elements and page != 1:
+            raise NotFound("Page not found")
+        data = {"elements": elements, "current_page": page}
+        data.update(self.count(query, per_page))
+        return data
+
+    def paginate_by_cursor(
+        self, query, cursor: str, per_page: int, with_count: bool = False
+    ) -> dict:
+        """Take the page of elements after a cursor, seeking on ``order_by``.
+
+        Args:
+            query: Filtered query.
+            cursor (str): Opaque cursor, empty for the first page.
+            per_page (int): Elements per page.
+            with_count (bool, optional): Count the total of items. Defaults to False.
+
+        Returns:
+            dict: Page data, to be serialized by the list schema.
+        """
+        page_query = query
+        if cursor:
+            page_query = page_query.filter(
+                self.order_by > decode_cursor(cursor, self.order_by)
+            )
+        elements = (
+            self.eager_load(page_query, element_schema(self.ClassSchemaList()))
+            .order_by(self.order_by)
+            .limit(per_page + 1)
+            .all()
+        )
+        data = {"elements": elements[:per_page]}
+        if len(elements) > per_page:
+            data["next_cursor"] = encode_cursor(
+                getattr(elements[per_page - 1], self.order_by.key)
+            )
+        if with_count:
+            data.update(self.count(query, per_page))
+        return data
 
     def get(self, query=None):
         """Get information from a list of elements. With pagination.
 
+        Paging is by page number, or by keyset when the ``cursor`` param is sent.
+
         Args:
             query (optional): SQLAlchemy query base, used for pre-filtering data. Defaults to None.
 
@@ -196,28 +473,172 @@ class GetListResorce:
             req_schema = self.QuerySchema().load(request.args)
             per_page = req_schema.pop("per_page")
             page = req_schema.pop("page")
+            cursor = req_schema.pop("cursor")
+            with_count = req_schema.pop("with_count")
         except ValidationError as error:
             raise BadRequest(error.messages)
-        if not query:
+        if query is None:
             query = self.ClassModel.query
-        for key, field in self.filter.items():
-            if req_schema.get(key):
-                query = query.filter(field.ilike(f"%{req_schema[key]}%"))
-        paginate = query.order_by(self.order_by).paginate(
-            per_page=per_page,
-            page=page,
-            error_out=True,
+        query = self.filter_query(query, req_schema)
+        if cursor is None:
+            data = self.paginate(query, page, per_page)
+        else:
+            data = self.paginate_by_cursor(query, cursor, per_page, with_count)
+        schema = compiled(self.ClassSchemaList)
+        with serialization_timer(schema):
+            return {"data": schema.dump(data)}
+
+
+class ExportResource(GetListResorce):
+    """Generic class for HTTP GET, streaming every element of a collection."""
+
+    MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    def __init__(self) -> None:
+        """Properties to be overwritten."""
+        self.ClassModel = None
+        self.ClassSchema = None
+        self.QuerySchema = None
+        self.filter = {}
+        self.order_by = None
+        self.search_backend = None
+        self.rank = []
+
+    def get(self, query=None):
+        """Stream the elements as NDJSON or CSV, honouring the list filters.
+
+        Rows are read with a server-side cursor and serialized one by one, so
+        memory does not grow with the collection. The body is gzipped when the
+        client accepts it.
+
+        Args:
+            query (optional): SQLAlchemy query base, used for pre-filtering data. Defaults to None.
+
+        Raises:
+            BadRequest: Error in validating sent data.
+
+        Returns:
+            Streamed response.
+        """
+        try:
+            req_schema = self.QuerySchema().load(request.args)
+        except ValidationError as error:
+            raise BadRequest(error.messages)
+        export_format = req_schema.pop("format")
+        if query is None:
+            query = self.ClassModel.query
+        schema = compiled(self.ClassSchema)
+        query = self.eager_load(self.filter_query(query, req_schema), schema.schema)
+        rows = stream.stream_rows(
+            query.order_by(*self.rank, self.order_by),
+            schema,
+            current_app.config.get("EXPORT_YIELD_PER", 1000),
+        )
+        lines = (
+            stream.csv_lines(rows)
+            if export_format == "csv"
+            else stream.ndjson_lines(rows, get_backend().dumps)
         )
-        schema = self.ClassSchemaList()
-        data = schema.dump(
-            {
-                "elements": paginate.items,
-                "current_page": paginate.page,
-                "total_pages": paginate.pages,
-                "total_items": paginate.total,
-            }
+        chunks = stream.buffered(lines)
+        compress = "gzip" in request.accept_encodings
+        if compress:
+            chunks = stream.gzip_chunks(chunks)
+        response = current_app.response_class(
+            stream_with_context(chunks), mimetype=self.MIMETYPES[export_format]
         )
-        return {"data": data}
+        response.headers[
+            "Content-Disposition"
+        ] = f"attachment; filename={self.order_by.class_.__tablename__}.{export_format}"
+        response.vary.add("Accept-Encoding")
+        if compress:
+            response.content_encoding = "gzip"
+        return response
+
+
+class BatchPostResource:
+    """Generic class for HTTP POST of many elements."""
+
+    def __init__(self) -> None:
+        """Properties to be overwritten."""
+        self.ClassModel = None
+        self.ClassSchema = None
+
+    def post(self):
+        """Save a batch of elements, based on generic schema.
+
+        Uniqueness is checked for the whole batch at once, and the valid
+        elements are saved in a single transaction.
+
+        Raises:
+            BadRequest: Error in validating sent data, in an atomic batch.
+
+        Returns:
+            Result of each element.
+        """
+        atomic = read_batch_mode()
+        items = read_batch()
+        schema = self.ClassSchema(many=True)
+        try:
+            loaded, errors = schema.load(items), {}
+        except ValidationError as error:
+            errors = error.messages if isinstance(error.messages, dict) else {}
+            if atomic or not errors:
+                raise BadRequest(error.messages)
+            loaded = [
+                None if index in errors else schema.make_instance(data)
+                for index, data in enumerate(error.valid_data)
+            ]
+        elements = {
+            index: element
+            for index, element in enumerate(loaded)
+            if index not in errors
+        }
+        return save_batch(self.ClassModel, elements, errors, atomic, CREATED)
+
+
+class BatchPatchResource:
+    """Generic class for HTTP PATCH of many elements."""
+
+    def __init__(self) -> None:
+        """Properties to be overwritten."""
+        self.ClassModel = None
+        self.ClassSchema = None
+
+    def patch(self):
+        """Partial update a batch of elements, identified by their ``id``.
+
+        The elements are taken with one query, uniqueness is checked for the
+        whole batch at once and the changes are saved in a single transaction.
+
+        Raises:
+            BadRequest: Error in validating sent data, in an atomic batch.
+
+        Returns:
+            Result of each element.
+        """
+        atomic = read_batch_mode()
+        items = read_batch()
+        ids = [item.get("id") for item in items if isinstance(item, dict)]
+        found = {
+            element.id: element
+            for element in self.ClassModel.query.filter(self.ClassModel.id.in_(ids))
+        }
+        schema = self.ClassSchema()
+        elements, errors = {}, {}
+        for index, item in enumerate(items):
+            item = dict(item) if isinstance(item, dict) else {}
+            element = found.get(item.pop("id", None))
+            if element is None:
+                errors[index] = {"id": ["Element not found"]}
+                continue
+            try:
+                elements[index] = schema.load(item, instance=element, partial=True)
+            except ValidationError as error:
+                errors[index] = error.messages
+        if atomic and errors:
+            ManagementMixin.discard_changes(*elements.values())
+            raise BadRequest(errors)
+        return save_batch(self.ClassModel, elements, errors, atomic, OK)
 
 
 class CRUDResource(GetResorce, PutResorce, PatchResource, DeleteResorce):
@@ -239,3 +660,15 @@ class CRUDListResource(GetListResorce, PostResource):
         self.QuerySchema = None
         self.filter = {}
         self.order_by = None
+        self.count_strategy = None
+        self.search_backend = None
+        self.rank = []
+
+
+class BatchResource(BatchPostResource, BatchPatchResource):
+    """HTTP methods condemning class, for batches."""
+
+    def __init__(self) -> None:
+        """Properties to be overwritten."""
+        self.ClassModel = None
+        self.ClassSchema = None
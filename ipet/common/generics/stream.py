@@ -0,0 +1,97 @@
+"""Module with the generators used to stream large responses, chunk by chunk."""
+import csv
+import zlib
+from io import StringIO
+
+CHUNK_SIZE = 64 * 1024
+
+
+def stream_rows(query, schema, yield_per: int = 1000):
+    """Serialize the elements of a query one by one, reading them with a server-side cursor.
+
+    Args:
+        query: SQLAlchemy query.
+        schema: Data schema instance.
+        yield_per (int, optional): Rows fetched per round trip. Defaults to 1000.
+
+    Yields:
+        dict: Serialized element.
+    """
+    query = query.execution_options(stream_results=True).yield_per(yield_per)
+    for element in query:
+        yield schema.dump(element)
+
+
+def buffered(lines, size: int = CHUNK_SIZE):
+    """Join lines into chunks of about ``size`` bytes.
+
+    Args:
+        lines: Text or bytes lines.
+        size (int, optional): Chunk size. Defaults to CHUNK_SIZE.
+
+    Yields:
+        bytes: Encoded chunk.
+    """
+    buffer, length = [], 0
+    for line in lines:
+        if isinstance(line, str):
+            line = line.encode()
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield b"".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def ndjson_lines(rows, dumps):
+    """Format rows as NDJSON.
+
+    Args:
+        rows: Serialized elements.
+        dumps: Function that encodes a row to bytes.
+
+    Yields:
+        bytes: JSON line.
+    """
+    for row in rows:
+        yield dumps(row) + b"\n"
+
+
+def csv_lines(rows):
+    """Format rows as CSV, with a header taken from the first row.
+
+    Args:
+        rows: Serialized elements.
+
+    Yields:
+        str: CSV line.
+    """
+    output = StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(output, fieldnames=list(row), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow(row)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of chunks as a single gzip member.
+
+    Args:
+        chunks: Bytes chunks.
+
+    Yields:
+        bytes: Compressed chunk.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -2,6 +2,8 @@
 from flask import Blueprint, Flask
 from flask_jwt_extended import JWTManager
 
+from ipet.ext.auth.cache import revocation_cache, user_cache
+from ipet.ext.auth.hashing import password_hasher
 from ipet.ext.auth.jwt_callback import register_callbacks
 from ipet.ext.auth.routes import register_routes
 
@@ -18,4 +20,7 @@ def init_app(app: Flask):
         app (Flask): Aplication instance.
     """
     jwt.init_app(app)
+    revocation_cache.init_app(app)
+    password_hasher.init_app(app)
+    user_cache.ttl = app.config.get("JWT_USER_CACHE_TTL", 30)
     app.register_blueprint(bp)
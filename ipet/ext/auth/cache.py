@@ -0,0 +1,152 @@
+"""Module with the per-process caches used by the JWT callbacks."""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Flask
+from redis.exceptions import RedisError
+
+from ipet.ext.db import db_redis
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize (int, optional): Maximum number of entries. Defaults to 1024.
+            ttl (float, optional): Entry lifetime, in seconds. Defaults to 30.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a live entry, refreshing its LRU position.
+
+        Args:
+            key: Entry key.
+            default (optional): Value returned on a miss. Defaults to None.
+
+        Returns:
+            Entry value or the default.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        """Store an entry, evicting the least recently used when full.
+
+        Args:
+            key: Entry key.
+            value: Entry value.
+            ttl (float, optional): Lifetime of this entry. Defaults to the cache TTL.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """Remove an entry.
+
+        Args:
+            key: Entry key.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+
+class RevocationCache:
+    """Local view of the revoked tokens kept in Redis.
+
+    Revoked ``jti`` are remembered until the token expires. Tokens found valid
+    are remembered for ``JWT_REVOCATION_MAX_DELAY`` seconds, which bounds how
+    long a revocation can go unnoticed if its pub/sub message is lost.
+    """
+
+    CHANNEL = "jwt:revoked"
+
+    def __init__(self) -> None:
+        """Initialize the caches with default lifetimes."""
+        self.revoked = TTLCache(maxsize=100000, ttl=3600)
+        self.valid = TTLCache(maxsize=100000, ttl=5)
+        self._listener = None
+
+    def init_app(self, app: Flask):
+        """Read the lifetimes and start listening to revocations.
+
+        Args:
+            app (Flask): Aplication instance.
+        """
+        self.revoked.ttl = app.config.get("JWT_ACCESS_TOKEN_EXPIRES", 3600)
+        self.valid.ttl = app.config.get("JWT_REVOCATION_MAX_DELAY", 5)
+        self.valid.clear()
+        if self._listener is None:
+            try:
+                pubsub = db_redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.CHANNEL: self._on_message})
+                self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            except RedisError:
+                app.logger.exception("Error subscribing to token revocations")
+
+    def _on_message(self, message: dict):
+        """Apply a revocation published by another process."""
+        self.mark_revoked(message["data"].decode())
+
+    def mark_revoked(self, jti: str):
+        """Remember locally that a token was revoked.
+
+        Args:
+            jti (str): Token identifier.
+        """
+        self.valid.pop(jti)
+        self.revoked.set(jti, True)
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check whether a token was revoked, asking Redis only on a local miss.
+
+        Args:
+            jti (str): Token identifier.
+
+        Returns:
+            bool: Whether the token was revoked.
+        """
+        if self.revoked.get(jti):
+            return True
+        if self.valid.get(jti):
+            return False
+        revoked = db_redis.get(jti) is not None
+        (self.revoked if revoked else self.valid).set(jti, True)
+        return revoked
+
+    def revoke(self, jti: str, expires):
+        """Revoke a token in Redis and notify the other processes.
+
+        Args:
+            jti (str): Token identifier.
+            expires (timedelta): Time until the token expires.
+        """
+        db_redis.set(jti, "", ex=expires)
+        self.mark_revoked(jti)
+        db_redis.publish(self.CHANNEL, jti)
+
+
+revocation_cache = RevocationCache()
+user_cache = TTLCache(maxsize=1024, ttl=30)
@@ -0,0 +1,148 @@
+"""Module that hashes and checks passwords off the request threads.
+
+PBKDF2 runs in a small thread pool of ``PASSWORD_HASH_WORKERS`` threads, so a
+burst of logins takes at most that many cores of each process. Up to
+``PASSWORD_HASH_QUEUE_SIZE`` more requests wait for a thread; beyond that the
+request is refused with 429 instead of holding a worker.
+
+New hashes use ``PASSWORD_HASH_ITERATIONS``; passwords stored with other
+parameters are hashed again at the next successful login.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+from werkzeug.exceptions import TooManyRequests
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+from ipet.ext.instrumentation.metrics import PASSWORD_HASH_LATENCY
+
+
+def hash_method(password_hash: str) -> str:
+    """Return the method of a stored hash, with its iterations made explicit.
+
+    Args:
+        password_hash (str): Hash in the ``method$salt$hash`` format.
+
+    Returns:
+        str: Method, e.g. ``pbkdf2:sha256:260000``.
+    """
+    method = password_hash.split("$", 1)[0]
+    if method.startswith("pbkdf2:") and method.count(":") == 1:
+        method = f"{method}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+    """Bounded thread pool that generates and checks password hashes."""
+
+    def __init__(self, workers: int = 2, queue_size: int = 8) -> None:
+        """Initialize the hasher with default limits.
+
+        Args:
+            workers (int, optional): Hashing threads. Defaults to 2.
+            queue_size (int, optional): Calls waiting for a thread. Defaults to 8.
+        """
+        self.method = f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+        self.retry_after = 1
+        self._configure(workers, queue_size)
+
+    def _configure(self, workers: int, queue_size: int):
+        """Create the thread pool and the slots of the calls it accepts."""
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="hasher")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def init_app(self, app: Flask):
+        """Read the work factor and the limits.
+
+        Args:
+            app (Flask): Aplication instance.
+        """
+        iterations = app.config.get(
+            "PASSWORD_HASH_ITERATIONS", DEFAULT_PBKDF2_ITERATIONS
+        )
+        self.method = f"pbkdf2:sha256:{iterations}"
+        self.retry_after = app.config.get("PASSWORD_HASH_RETRY_AFTER", 1)
+        workers = app.config.get("PASSWORD_HASH_WORKERS", 2)
+        queue_size = app.config.get("PASSWORD_HASH_QUEUE_SIZE", 8)
+        if (workers, queue_size) != (self.workers, self.queue_size):
+            self._executor.shutdown(wait=False)
+            self._configure(workers, queue_size)
+
+    def _run(self, operation: str, func, *args):
+        """Run a hash function in the pool and wait for its result.
+
+        Args:
+            operation (str): "generate" or "check", the metric label.
+            func: Function to run.
+            args: Function arguments.
+
+        Raises:
+            TooManyRequests: Every thread is busy and the queue is full.
+
+        Returns:
+            Function result.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise TooManyRequests(
+                "Too many password checks, try again later",
+                retry_after=self.retry_after,
+            )
+
+        def timed():
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                PASSWORD_HASH_LATENCY.labels(operation).observe(
+                    time.perf_counter() - start
+                )
+
+        try:
+            return self._executor.submit(timed).result()
+        finally:
+            self._slots.release()
+
+    def generate(self, password: str) -> str:
+        """Hash a password with the current work factor.
+
+        Args:
+            password (str): Plain text password.
+
+        Returns:
+            str: Password hash.
+        """
+        return self._run("generate", generate_password_hash, password, self.method)
+
+    def check(self, password_hash: str, password: str) -> bool:
+        """Check a password against its hash.
+
+        Args:
+            password_hash (str): Stored hash.
+            password (str): Plain text password.
+
+        Returns:
+            bool: Whether the password matches.
+        """
+        return self._run("check", check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Check whether a hash was made with other parameters than the current ones.
+
+        Args:
+            password_hash (str): Stored hash.
+
+        Returns:
+            bool: Whether the password should be hashed again.
+        """
+        return hash_method(password_hash) != self.method
+
+
+password_hasher = PasswordHasher()
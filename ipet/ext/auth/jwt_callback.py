@@ -2,9 +2,11 @@
 from typing import Union
 
 from flask_jwt_extended import JWTManager
+from sqlalchemy.orm import make_transient_to_detached
 
+from ipet.ext.auth.cache import revocation_cache, user_cache
 from ipet.ext.auth.models import User
-from ipet.ext.db import db_redis
+from ipet.ext.db import db
 
 
 def register_callbacks(jwt: JWTManager):
@@ -34,7 +36,8 @@ def register_callbacks(jwt: JWTManager):
     def user_loockup_callback(_, jwt_playload):
         """Use to convert a JWT into a python object that can \
         be used in a protected endpoint. This is useful for automatically \
-        loading a SQLAlchemy instance based on the contents of the JWT.
+        loading a SQLAlchemy instance based on the contents of the JWT. \
+        Users are cached per process for ``JWT_USER_CACHE_TTL`` seconds.
 
         Args:
             _ (dict): Dictionary containing the header data of the JWT.
@@ -44,11 +47,25 @@ def register_callbacks(jwt: JWTManager):
             (User): Return a user instance.
         """
         identity = jwt_playload["sub"]
-        return User.query.get(identity)
+        values = user_cache.get(identity)
+        if values is None:
+            user = User.query.get(identity)
+            if user:
+                user_cache.set(
+                    identity,
+                    {
+                        column.key: getattr(user, column.key)
+                        for column in User.__table__.columns
+                    },
+                )
+            return user
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
 
     @jwt.token_in_blocklist_loader
     def token_in_blocklist_callback(_, jwt_playload):
-        """Use to check if a JWT has been revoked.
+        """Use to check if a JWT has been revoked, through the local revocation cache.
 
         Args:
             _ (dict): Dictionary containing the header data of the JWT.
@@ -58,6 +75,4 @@ def register_callbacks(jwt: JWTManager):
             The function must be return ``True`` if the token has been
             revoked, ``False`` otherwise.
         """
-        jti = jwt_playload["jti"]
-        token_in_redis = db_redis.get(jti)
-        return token_in_redis is not None
+        return revocation_cache.is_revoked(jwt_playload["jti"])
@@ -7,6 +7,8 @@ class User(db.Model, ManagementMixin):
     """User data model."""
 
     __tablename__ = "users"
+    __unique_fields__ = (("username",),)
+    __unique_message__ = {"username": ["Username already exists"]}
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(), unique=True, nullable=False)
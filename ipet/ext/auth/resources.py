@@ -13,21 +13,17 @@ from flask_jwt_extended import (
 from flask_restful import Resource
 from marshmallow.exceptions import ValidationError
 from werkzeug.exceptions import BadRequest
-from werkzeug.security import check_password_hash, generate_password_hash
 
+from ipet.ext.auth.cache import revocation_cache, user_cache
+from ipet.ext.auth.hashing import password_hasher
 from ipet.ext.auth.models import User
 from ipet.ext.auth.schema import UserSchema
 from ipet.ext.config import environment_var
-from ipet.ext.db import db_redis
 
 
-def get_json_user(custom_validate: bool = True):
+def get_json_user():
     """Get an instance of User.
 
-    Args:
-        custom_validate (bool, optional): Define whether the schema should use custom validations.
-        Defaults to True.
-
     Raises:
         BadRequest: Error in validating sent data.
 
@@ -35,9 +31,7 @@ def get_json_user(custom_validate: bool = True):
         return validated data
     """
     try:
-        schema = UserSchema()
-        schema.context = {"custom_validate": custom_validate}
-        json_data = schema.load(request.get_json())
+        json_data = UserSchema().load(request.get_json())
     except ValidationError as error:
         raise BadRequest(error.messages)
     return json_data
@@ -57,8 +51,8 @@ class TokenResource(Resource):
           - in: body
             schema: UserSchema
         responses:
-            400, 500:
-                description: Bad Request, Internal Error
+            400, 429, 500:
+                description: Bad Request, Too Many Requests, Internal Error
                 schema:
                     type: object
                     properties:
@@ -70,9 +64,13 @@ class TokenResource(Resource):
                     properties:
                         data: RefreshTokenSchema
         """
-        json_user = get_json_user(False)
+        json_user = get_json_user()
         user = User.query.filter_by(username=json_user["username"]).first()
-        if user and check_password_hash(user.password, json_user["password"]):
+        if user and password_hasher.check(user.password, json_user["password"]):
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.generate(json_user["password"])
+                user.save("Error updating password")
+                user_cache.pop(user.id)
             return {
                 "token": create_access_token(identity=user),
                 "refresh_token": create_refresh_token(identity=user),
@@ -141,10 +139,9 @@ class InvalidateTokenResource(Resource):
                     properties:
                         "message": {"type": "string"}
         """
-        db_redis.set(
+        revocation_cache.revoke(
             get_jwt()["jti"],
-            "",
-            ex=timedelta(seconds=environment_var.JWT_ACCESS_TOKEN_EXPIRES),
+            timedelta(seconds=environment_var.JWT_ACCESS_TOKEN_EXPIRES),
         )
         return {"message": "Successfully invalidated token"}
 
@@ -163,15 +160,18 @@ class CreateUserResource(Resource):
           - in: body
             schema: UserSchema
         responses:
-            201, 400, 500:
-                description: Created, Bad Request, Internal Error
+            201, 400, 429, 500:
+                description: Created, Bad Request, Too Many Requests, Internal Error
                 schema:
                     type: object
                     properties:
                         "message": {"type": "string"}
         """
         json_user = get_json_user()
-        json_user["password"] = generate_password_hash(json_user["password"])
         user = User(**json_user)
-        user.save("Error adding user")
+        conflicts = User.find_conflicts({0: user})
+        if conflicts:
+            raise BadRequest(conflicts[0])
+        user.password = password_hasher.generate(json_user["password"])
+        User.insert_element(user, "Error adding user")
         return {"message": "User added successfully"}, CREATED
@@ -2,6 +2,7 @@
 from flask import Blueprint
 from flask_restful import Api
 
+from ipet.common.generics.json_backend import output_json
 from ipet.ext.auth.resources import (
     CreateUserResource,
     InvalidateTokenResource,
@@ -17,6 +18,7 @@ def register_routes(bp: Blueprint):
         bp (Blueprint): Package blueprint instance.
     """
     api = Api(bp)
+    api.representation("application/json")(output_json)
     api.add_resource(CreateUserResource, "/")
     api.add_resource(TokenResource, "/token")
     api.add_resource(RefreshTokenResource, "/token/refresh")
@@ -1,6 +1,4 @@
 """Module that implements serialization and validation of data referring to the authentication's domain."""
-from marshmallow import ValidationError, validates
-
 from ipet.ext.auth.models import User
 from ipet.ext.libs import ma
 
@@ -16,15 +14,6 @@ class UserSchema(ma.SQLAlchemySchema):
     username = ma.auto_field(description="Username")
     password = ma.auto_field(description="Password")
 
-    @validates("username")
-    def unique(self, value):
-        """Ensure that there is no duplication of username."""
-        if (
-            self.context.get("custom_validate")
-            and User.query.filter(User.username == value).first()
-        ):
-            raise ValidationError("Username already exists")
-
 
 class AuthorizationSchema(ma.Schema):
     """Data schema for header with token."""
@@ -1,10 +1,12 @@
-"""Terminal custom commands registration module."""
+"""Terminal custom commands registration module.
+
+The command implementations, which import every model, are only loaded
+when a command runs.
+"""
 
 import click
 from flask import Flask
 
-from ipet.ext.cli import views
-
 
 def init_app(app: Flask):
     """Register commands.
@@ -15,12 +17,37 @@ def init_app(app: Flask):
 
     @app.cli.command()
     def create_db():
+        from ipet.ext.cli import views
+
         click.echo(views.create_db())
 
     @app.cli.command()
     def drop_db():
+        from ipet.ext.cli import views
+
         click.echo(views.drop_db())
 
     @app.cli.command()
     def populate_db():
+        from ipet.ext.cli import views
+
         click.echo(views.populate_db())
+
+    @app.cli.command()
+    @click.argument("output", default="openapi.json")
+    def build_spec(output):
+        from ipet.ext.cli import views
+
+        click.echo(views.build_spec(output))
+
+    @app.cli.command()
+    def startup_profile():
+        from ipet.ext.cli import views
+
+        click.echo(views.startup_profile())
+
+    @app.cli.command()
+    def run_worker():
+        from ipet.ext.cli import views
+
+        click.echo(views.run_worker())
@@ -1,22 +1,30 @@
 """Terminal functions module."""
+import resource
 from datetime import datetime
 
-from werkzeug.security import generate_password_hash
+from flask import current_app
 
+from ipet.ext.auth.hashing import password_hasher
 from ipet.ext.auth.models import User
 from ipet.ext.customer.models import AssocProductCustomer, Customer
 from ipet.ext.db import db
+from ipet.ext.db.constraints import create_unique_indexes
+from ipet.ext.db.search import create_search_indexes, drop_search_indexes
+from ipet.ext.doc.spec import serialize_spec
 from ipet.ext.product.models import Product
 
 
 def create_db():
-    """Create the table structure.
+    """Create the table structure, the unique indexes missing from existing \
+    tables and the indexes of the search backend.
 
     Returns:
         str: Error or success message.
     """
     try:
         db.create_all()
+        create_unique_indexes()
+        create_search_indexes(current_app.config.get("SEARCH_BACKEND", "ilike"))
         return "Database created successfully!"
     except Exception as exp:
         return f"Erro: {exp.args[0]}"
@@ -29,6 +37,7 @@ def drop_db():
         str: Error or success message.
     """
     try:
+        drop_search_indexes()
         db.drop_all()
         return "Database successfully deleted!"
     except Exception as exp:
@@ -41,7 +50,7 @@ def populate_db():
     Returns:
         str: Error or success message.
     """
-    user = User(username="admin", password=generate_password_hash("admin"))
+    user = User(username="admin", password=password_hasher.generate("admin"))
     customer1 = Customer(
         cpf=38164206572,
         full_name="Kelmer Souza Passos",
@@ -127,3 +136,57 @@ def populate_db():
         return "Records created successfully!"
     except Exception as exp:
         return f"Erro: {exp.args[0]}"
+
+
+def build_spec(output: str):
+    """Write the OpenAPI document, to be served through ``OPENAPI_SPEC_FILE``.
+
+    Args:
+        output (str): Path of the JSON file.
+
+    Returns:
+        str: Error or success message.
+    """
+    try:
+        with open(output, "wb") as file:
+            file.write(serialize_spec(current_app))
+        return f"OpenAPI spec written to {output}"
+    except Exception as exp:
+        return f"Erro: {exp.args[0]}"
+
+
+def startup_profile():
+    """Summarize the startup of the process: time per extension and peak memory.
+
+    Import times only cover modules not imported by a previous extension.
+
+    Returns:
+        str: Report, one line per extension.
+    """
+    lines = [f"Role: {current_app.config.get('PROCESS_ROLE', 'all')}"]
+    total = 0.0
+    for entry in current_app.extensions.get("startup_profile", []):
+        if not entry["loaded"]:
+            lines.append(f"{entry['extension']:<40} skipped")
+            continue
+        total += entry["import_ms"] + entry["init_ms"]
+        lines.append(
+            f"{entry['extension']:<40} import {entry['import_ms']:8.1f} ms"
+            f"  init_app {entry['init_ms']:8.1f} ms"
+        )
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    lines.append(f"Total {total:.1f} ms, peak memory {peak:.1f} MiB")
+    return "\n".join(lines)
+
+
+def run_worker():
+    """Run the scheduled jobs until the process receives SIGTERM or SIGINT.
+
+    Returns:
+        str: Shutdown message.
+    """
+    from ipet.ext.libs import scheduler
+    from ipet.ext.libs.worker import Worker
+
+    Worker(current_app._get_current_object(), scheduler).run()
+    return "Worker stopped"
@@ -3,16 +3,19 @@ from dynaconf import FlaskDynaconf
 from flask import Flask
 
 from ipet.ext.config.environment import EnvironmentVar
+from ipet.ext.config.extensions import load_extensions
 
 environment_var = EnvironmentVar()
 
 
 def init_app(app: Flask):
     """Initialize module in application. \
-    The dynaconf library manages the initialization of packages and configuration variables.
+    The dynaconf library manages the configuration variables, and the extensions \
+    of the process role (``PROCESS_ROLE``) are loaded afterwards.
 
     Args:
         app (Flask): Aplication instance.
     """
-    FlaskDynaconf(app, extensions_list="INSTALLED_EXTENSIONS")
+    FlaskDynaconf(app)
     environment_var.init_app(app)
+    load_extensions(app)
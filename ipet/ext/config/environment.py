@@ -18,3 +18,5 @@ class EnvironmentVar:
         cls.SSH_USER = app.config.get("SSH_USER")
         cls.SSH_PASSWORD = app.config.get("SSH_PASSWORD")
         cls.DB_FILE_PATH = app.config.get("DB_FILE_PATH")
+        cls.DB_FILE_COMPRESSION = app.config.get("DB_FILE_COMPRESSION", "auto")
+        cls.OFFLINE_CHUNK_SIZE = app.config.get("OFFLINE_CHUNK_SIZE", 5000)
@@ -0,0 +1,57 @@
+"""Module that loads the extensions of the process role, timing each one."""
+import importlib
+import time
+
+from flask import Flask
+
+ALL_ROLES = "all"
+
+
+def role_allows(app: Flask, module_name: str) -> bool:
+    """Check whether an extension is used by the role of the process.
+
+    ``EXTENSION_ROLES`` maps the package name of an extension to the roles
+    that load it; extensions left out are loaded by every role.
+
+    Args:
+        app (Flask): Aplication instance.
+        module_name (str): Extension module, such as ``ipet.ext.doc``.
+
+    Returns:
+        bool: Whether the extension is loaded.
+    """
+    role = app.config.get("PROCESS_ROLE", ALL_ROLES)
+    if role == ALL_ROLES:
+        return True
+    roles = app.config.get("EXTENSION_ROLES", {}).get(module_name.rsplit(".", 1)[-1])
+    return roles is None or role in roles
+
+
+def load_extensions(app: Flask):
+    """Import and initialize the ``INSTALLED_EXTENSIONS`` of the process role.
+
+    The import and ``init_app`` times of each extension are kept in
+    ``app.extensions["startup_profile"]``.
+
+    Args:
+        app (Flask): Aplication instance.
+    """
+    profile = []
+    for entry in app.config.get("INSTALLED_EXTENSIONS", []):
+        module_name, _, function_name = entry.partition(":")
+        if not role_allows(app, module_name):
+            profile.append({"extension": entry, "loaded": False})
+            continue
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        imported = time.perf_counter()
+        getattr(module, function_name or "init_app")(app)
+        profile.append(
+            {
+                "extension": entry,
+                "loaded": True,
+                "import_ms": (imported - start) * 1000,
+                "init_ms": (time.perf_counter() - imported) * 1000,
+            }
+        )
+    app.extensions["startup_profile"] = profile
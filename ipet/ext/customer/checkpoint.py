@@ -0,0 +1,111 @@
+"""Module that keeps track of how much of the offline database was imported."""
+from hashlib import sha256
+
+from ipet.ext.db import db_redis
+
+
+class OfflineCheckpoint:
+    """Byte offset of the offline database already imported, kept in Redis.
+
+    A changed file is detected without reading the imported prefix whole, from:
+
+    - the hash of the first and of the last ``WINDOW`` bytes before the offset,
+      so the prefix is only compared at its two ends: a file rewritten with
+      both ends identical but a different middle passes as unchanged;
+    - the file modification time, which appending only moves forward, so a
+      file replaced by an older one is detected;
+    - the file size, which must not be smaller than the offset.
+
+    The size seen by the last run also tells whether the file is still being
+    written.
+    """
+
+    KEY = "offline_base:checkpoint:{path}"
+    WINDOW = 4096
+
+    def __init__(self, path: str) -> None:
+        """Initialize the checkpoint of a file.
+
+        Args:
+            path (str): Offline database path, in the SSH server.
+        """
+        self.key = self.KEY.format(path=path)
+        self.offset = 0
+        self.digest = None
+        self.size = None
+        self.mtime = None
+
+    @classmethod
+    def window_digest(cls, file, offset: int) -> str:
+        """Hash the first and the last ``WINDOW`` bytes of a file before an offset.
+
+        Args:
+            file: Binary file object, with seek and read.
+            offset (int): Offset where the prefix ends.
+
+        Returns:
+            str: Hexadecimal digest.
+        """
+        digest = sha256()
+        head = min(cls.WINDOW, offset)
+        file.seek(0)
+        digest.update(file.read(head))
+        start = max(offset - cls.WINDOW, head)
+        file.seek(start)
+        digest.update(file.read(offset - start))
+        return digest.hexdigest()
+
+    def load(self):
+        """Read the checkpoint from Redis.
+
+        Returns:
+            OfflineCheckpoint: The instance itself.
+        """
+        data = db_redis.hgetall(self.key)
+        self.offset = int(data.get(b"offset", 0))
+        self.digest = data[b"digest"].decode() if b"digest" in data else None
+        self.size = int(data[b"size"]) if b"size" in data else None
+        self.mtime = float(data[b"mtime"]) if b"mtime" in data else None
+        return self
+
+    def save(self, offset: int, digest: str, size: int, mtime: float = None):
+        """Store a new offset, the hash of the bytes preceding it and the file state.
+
+        Args:
+            offset (int): Offset of the first byte not yet imported.
+            digest (str): Result of ``window_digest`` for the offset.
+            size (int): File size seen by this run.
+            mtime (float, optional): File modification time seen by this run. Defaults to None.
+        """
+        self.offset, self.digest, self.size, self.mtime = offset, digest, size, mtime
+        mapping = {"offset": offset, "digest": digest, "size": size}
+        if mtime is not None:
+            mapping["mtime"] = mtime
+        pipeline = db_redis.pipeline()
+        pipeline.delete(self.key)
+        pipeline.hset(self.key, mapping=mapping)
+        pipeline.execute()
+
+    def clear(self):
+        """Forget the checkpoint, forcing a full import on the next run."""
+        self.offset, self.digest, self.size, self.mtime = 0, None, None, None
+        db_redis.delete(self.key)
+
+    def resume_offset(self, file, size: int, mtime: float = None) -> int:
+        """Return where the next import must start.
+
+        Args:
+            file: Binary file object, with seek and read.
+            size (int): Current file size.
+            mtime (float, optional): Current file modification time. Defaults to None.
+
+        Returns:
+            int: The stored offset, or 0 when the imported prefix has changed.
+        """
+        if not self.offset or not self.digest or size < self.offset:
+            return 0
+        if mtime is not None and self.mtime is not None and mtime < self.mtime:
+            return 0
+        if self.window_digest(file, self.offset) != self.digest:
+            return 0
+        return self.offset
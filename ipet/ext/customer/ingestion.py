@@ -0,0 +1,251 @@
+"""Module that imports offline database records in set-based batches."""
+import io
+import time
+from itertools import islice
+from logging import Logger
+from typing import Callable, Iterable, Iterator
+
+from redis.exceptions import RedisError
+
+from ipet.ext.customer.models import AssocProductCustomer, Customer
+from ipet.ext.customer.schemas import ProductCustomerSchema
+from ipet.ext.db import db
+from ipet.ext.db.counting import invalidate_counts
+from ipet.ext.db.transaction import unit_of_work
+from ipet.ext.instrumentation.metrics import INGESTED_ROWS
+from ipet.ext.product.models import Product
+
+COPY_COLUMNS = ("customer_id", "product_id", "current_status", "created_at")
+
+
+class IngestionReport:
+    """Counters of an offline database import."""
+
+    def __init__(self) -> None:
+        """Start the counters and the timer."""
+        self.accepted = 0
+        self.duplicate = 0
+        self.rejected = 0
+        self.failed = 0
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    @property
+    def total(self) -> int:
+        """Return the number of processed rows."""
+        return self.accepted + self.duplicate + self.rejected + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        """Return the elapsed time, in seconds."""
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        """Return the import throughput."""
+        elapsed = self.elapsed
+        return self.total / elapsed if elapsed else 0.0
+
+    def add(self, outcome: str, rows: int = 1):
+        """Count rows, also in the Prometheus metrics.
+
+        Args:
+            outcome (str): "accepted", "duplicate", "rejected" or "failed".
+            rows (int, optional): Number of rows. Defaults to 1.
+        """
+        setattr(self, outcome, getattr(self, outcome) + rows)
+        INGESTED_ROWS.labels(outcome).inc(rows)
+
+    def finish(self):
+        """Stop the timer."""
+        self.finished_at = time.perf_counter()
+        return self
+
+    def __str__(self) -> str:
+        """Summarize the import."""
+        return (
+            f"{self.total} rows in {self.elapsed:.2f}s "
+            f"({self.rows_per_second:.0f} rows/s): accepted {self.accepted}, "
+            f"duplicate {self.duplicate}, rejected {self.rejected}, "
+            f"failed {self.failed}"
+        )
+
+
+def chunked(lines: Iterable[str], size: int) -> Iterator[list]:
+    """Split an iterable in lists with at most ``size`` elements.
+
+    Args:
+        lines (Iterable[str]): Elements to be split.
+        size (int): Maximum size of each list.
+
+    Yields:
+        list: Next chunk.
+    """
+    iterator = iter(lines)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_lines(lines: list, report: IngestionReport, logger: Logger) -> list:
+    """Normalize the records of a chunk, discarding the invalid ones.
+
+    Args:
+        lines (list): Raw offline database lines.
+        report (IngestionReport): Import counters.
+        logger (Logger): Logger instance.
+
+    Returns:
+        list: Tuples of customer_id, product_id and created_at.
+    """
+    rows = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = ProductCustomerSchema.normalize_data_list(line.split("|"))
+        except ValueError as exp:
+            report.add("rejected")
+            logger.error(exp.args[0])
+            continue
+        rows.append((int(data[0]), int(data[1]), data[2]))
+    return rows
+
+
+def copy_rows(rows: list):
+    """Write association rows with PostgreSQL COPY, in the session transaction.
+
+    Args:
+        rows (list): Association rows as dictionaries.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(
+            f"{row['customer_id']}\t{row['product_id']}\t"
+            f"{row['current_status']}\t{row['created_at'].isoformat()}\n"
+        )
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {AssocProductCustomer.__tablename__} "
+            f"({', '.join(COPY_COLUMNS)}) FROM STDIN",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert(rows: list):
+    """Insert association rows, with COPY on PostgreSQL and executemany elsewhere.
+
+    Args:
+        rows (list): Association rows as dictionaries.
+    """
+    if not rows:
+        return
+    if db.engine.dialect.name == "postgresql":
+        copy_rows(rows)
+    else:
+        db.session.execute(AssocProductCustomer.__table__.insert(), rows)
+
+
+def ingest_chunk(lines: list, report: IngestionReport, logger: Logger) -> bool:
+    """Validate and save a chunk of offline database lines in one unit of work.
+
+    Customers, products and existing associations are resolved with one query each.
+
+    Args:
+        lines (list): Raw offline database lines.
+        report (IngestionReport): Import counters.
+        logger (Logger): Logger instance.
+
+    Returns:
+        bool: Whether the chunk was committed; its rows count as failed otherwise.
+    """
+    rows = parse_lines(lines, report, logger)
+    if not rows:
+        return True
+    customer_ids = {row[0] for row in rows}
+    product_ids = {row[1] for row in rows}
+    found_customers = {
+        id
+        for id, in db.session.query(Customer.id).filter(Customer.id.in_(customer_ids))
+    }
+    found_products = {
+        id for id, in db.session.query(Product.id).filter(Product.id.in_(product_ids))
+    }
+    existing = {
+        tuple(pair)
+        for pair in db.session.query(
+            AssocProductCustomer.customer_id, AssocProductCustomer.product_id
+        ).filter(
+            AssocProductCustomer.customer_id.in_(customer_ids),
+            AssocProductCustomer.product_id.in_(product_ids),
+        )
+    }
+    accepted = []
+    for customer_id, product_id, created_at in rows:
+        if (customer_id, product_id) in existing:
+            report.add("duplicate")
+            logger.info(
+                f"Customer already owns this product: product_id {product_id}, customer_id {customer_id}"
+            )
+        elif customer_id in found_customers and product_id in found_products:
+            existing.add((customer_id, product_id))
+            accepted.append(
+                {
+                    "customer_id": customer_id,
+                    "product_id": product_id,
+                    "current_status": "ACTIVE",
+                    "created_at": created_at,
+                }
+            )
+        else:
+            report.add("rejected")
+            logger.error(
+                f"ID not found: product_id {product_id}, customer_id {customer_id}"
+            )
+    try:
+        with unit_of_work():
+            bulk_insert(accepted)
+    except Exception:
+        logger.exception("Error saving offline database chunk")
+        report.add("failed", len(accepted))
+        return False
+    if accepted:
+        try:
+            invalidate_counts(AssocProductCustomer.__tablename__)
+        except RedisError:
+            logger.warning("Error invalidating cached counts", exc_info=True)
+    report.add("accepted", len(accepted))
+    return True
+
+
+def ingest_lines(
+    lines: Iterable[str],
+    logger: Logger,
+    chunk_size: int = 5000,
+    on_commit: Callable[[], None] = None,
+) -> IngestionReport:
+    """Import offline database lines in chunks, stopping at the first failed chunk.
+
+    The lines after a failed chunk are not read, so a resumable source can
+    retry from the end of the last committed one.
+
+    Args:
+        lines (Iterable[str]): Raw offline database lines.
+        logger (Logger): Logger instance.
+        chunk_size (int, optional): Lines per transaction. Defaults to 5000.
+        on_commit (Callable, optional): Called after each committed chunk. Defaults to None.
+
+    Returns:
+        IngestionReport: Import counters.
+    """
+    report = IngestionReport()
+    for chunk in chunked(lines, chunk_size):
+        if not ingest_chunk(chunk, report, logger):
+            break
+        if on_commit:
+            on_commit()
+    logger.info(f"Offline database imported: {report.finish()}")
+    return report
@@ -7,6 +7,9 @@ class Customer(db.Model, ManagementMixin):
     """Customer data model."""
 
     __tablename__ = "customer"
+    __searchable__ = ("full_name",)
+    __unique_fields__ = (("cpf",),)
+    __unique_message__ = {"cpf": ["CPF already registered"]}
 
     id = db.Column(db.Integer, primary_key=True)
     cpf = db.Column(db.BigInteger, nullable=False, unique=True)
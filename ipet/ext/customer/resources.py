@@ -5,17 +5,32 @@ from flask_restful import Resource
 from marshmallow import ValidationError
 from werkzeug.exceptions import BadRequest, NotFound
 
-from ipet.common.generics.resource import CRUDListResource, CRUDResource, GetListResorce
+from ipet.common.generics.compiler import compiled
+from ipet.common.generics.resource import (
+    BatchResource,
+    CRUDListResource,
+    CRUDResource,
+    ExportResource,
+    GetListResorce,
+)
 from ipet.ext.customer.models import AssocProductCustomer, Customer
 from ipet.ext.customer.schemas import (
     CustomerListSchema,
+    CustomerReadSchema,
     CustomerSchema,
+    CustomersExportQuerySchema,
     CustomersQuerySchema,
     ProductCustomerSchema,
     ProductStatusSchema,
 )
+from ipet.ext.db.loading import loader_options
 from ipet.ext.product.models import Product
-from ipet.ext.product.schemas import ProductListSchema, ProductsQuerySchema
+from ipet.ext.product.schemas import (
+    ProductListSchema,
+    ProductSchema,
+    ProductsExportQuerySchema,
+    ProductsQuerySchema,
+)
 
 
 class ProductCustomerResource(Resource):
@@ -36,10 +51,16 @@ class ProductCustomerResource(Resource):
         Returns:
             AssocProductCustomer: Returns an instance of the model
         """
-        assoc = AssocProductCustomer.query.filter(
-            AssocProductCustomer.customer_id == customer_id,
-            AssocProductCustomer.product_id == product_id,
-        ).first()
+        assoc = (
+            AssocProductCustomer.query.options(
+                *loader_options(AssocProductCustomer, ProductCustomerSchema())
+            )
+            .filter(
+                AssocProductCustomer.customer_id == customer_id,
+                AssocProductCustomer.product_id == product_id,
+            )
+            .first()
+        )
         if not assoc:
             raise NotFound("Element not found")
         return assoc
@@ -74,7 +95,7 @@ class ProductCustomerResource(Resource):
                         data: ProductCustomerSchema
         """
         assoc = self.find_element(id, product_id)
-        return {"data": ProductCustomerSchema().dump(assoc)}
+        return {"data": compiled(ProductCustomerSchema).dump(assoc)}
 
     @jwt_required()
     def patch(self, id, product_id):
@@ -373,3 +394,186 @@ class CustomerResource(Resource, CRUDResource):
                         "message": {"type": "string"}
         """
         return super().delete(id)
+
+
+class CustomerBatchResource(Resource, BatchResource):
+    """Resource corresponding to batches of Customer elements."""
+
+    def __init__(self) -> None:
+        """Initialize properties needed by generic CRUD functions."""
+        super().__init__()
+        self.ClassModel = Customer
+        self.ClassSchema = CustomerSchema
+
+    @jwt_required()
+    def post(self):
+        """Create many customers.
+
+        ---
+        tags:
+        - Customer
+        summary: Create many customers, sent as a JSON array or NDJSON
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+          - in: query
+            schema: BatchQuerySchema
+        requestBody:
+            content:
+                application/json:
+                    schema:
+                        type: array
+                        items: CustomerSchema
+                application/x-ndjson:
+                    schema: CustomerSchema
+        responses:
+            400, 401, 500:
+                description: Bad Request, Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "object"}
+            201, 207:
+                description: All customers created, some customers rejected
+                schema:
+                    type: object
+                    properties:
+                        data: {"type": "array", "items": {"type": "object"}}
+        """
+        return super().post()
+
+    @jwt_required()
+    def patch(self):
+        """Partial update many customers.
+
+        ---
+        tags:
+        - Customer
+        summary: Partially update many customers, identified by id
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+          - in: query
+            schema: BatchQuerySchema
+        requestBody:
+            content:
+                application/json:
+                    schema:
+                        type: array
+                        items: CustomerSchema
+                application/x-ndjson:
+                    schema: CustomerSchema
+        responses:
+            400, 401, 500:
+                description: Bad Request, Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "object"}
+            200, 207:
+                description: All customers updated, some customers rejected
+                schema:
+                    type: object
+                    properties:
+                        data: {"type": "array", "items": {"type": "object"}}
+        """
+        return super().patch()
+
+
+class CustomerExportResource(Resource, ExportResource):
+    """Resource that streams every customer."""
+
+    def __init__(self) -> None:
+        """Initialize properties needed by generic CRUD functions."""
+        super().__init__()
+        self.ClassModel = Customer
+        self.ClassSchema = CustomerReadSchema
+        self.QuerySchema = CustomersExportQuerySchema
+        self.filter = {"full_name": Customer.full_name}
+        self.order_by = Customer.id
+
+    @jwt_required()
+    def get(self):
+        """Export every customer.
+
+        ---
+        tags:
+        - Customer
+        summary: Export every customer, as NDJSON or CSV
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+          - in: query
+            schema: CustomersExportQuerySchema
+        responses:
+            400, 401, 500:
+                description: Bad Request, Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "string"}
+            200:
+                description: Returns one CustomerReadSchema object per line
+                content:
+                    application/x-ndjson:
+                        schema: CustomerReadSchema
+                    text/csv:
+                        schema: CustomerReadSchema
+        """
+        return super().get()
+
+
+class ProdsByCustumerExportResource(Resource, ExportResource):
+    """Resource that streams the products of a customer."""
+
+    def __init__(self) -> None:
+        """Initialize properties needed by generic CRUD functions."""
+        super().__init__()
+        self.ClassSchema = ProductSchema
+        self.QuerySchema = ProductsExportQuerySchema
+        self.filter = {"full_name": Product.full_name, "brand": Product.brand}
+        self.order_by = Product.id
+
+    @jwt_required()
+    def get(self, id):
+        """Export the products of a customer.
+
+        ---
+        tags:
+        - Customer
+        summary: Export the products of a customer, as NDJSON or CSV
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+          - in: path
+            schema: DetailUrlParamSchema
+          - in: query
+            schema: ProductsExportQuerySchema
+        responses:
+            400, 401, 500:
+                description: Bad Request, Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "string"}
+            200:
+                description: Returns one ProductSchema object per line
+                content:
+                    application/x-ndjson:
+                        schema: ProductSchema
+                    text/csv:
+                        schema: ProductSchema
+        """
+        return super().get(
+            Product.query.join(AssocProductCustomer)
+            .join(Customer)
+            .filter(Customer.id == id)
+        )
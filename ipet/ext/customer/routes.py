@@ -2,9 +2,13 @@
 from flask import Blueprint
 from flask_restful import Api
 
+from ipet.common.generics.json_backend import output_json
 from ipet.ext.customer.resources import (
+    CustomerBatchResource,
+    CustomerExportResource,
     CustomerListResource,
     CustomerResource,
+    ProdsByCustumerExportResource,
     ProdsByCustumerResource,
     ProductCustomerResource,
 )
@@ -17,7 +21,11 @@ def register_routes(bp: Blueprint):
         bp (Blueprint): Package blueprint instance.
     """
     api = Api(bp)
+    api.representation("application/json")(output_json)
     api.add_resource(CustomerListResource, "/")
     api.add_resource(CustomerResource, "/<int:id>")
+    api.add_resource(CustomerBatchResource, "/batch")
+    api.add_resource(CustomerExportResource, "/export")
     api.add_resource(ProdsByCustumerResource, "/<int:id>/product")
+    api.add_resource(ProdsByCustumerExportResource, "/<int:id>/product/export")
     api.add_resource(ProductCustomerResource, "/<int:id>/product/<int:product_id>")
@@ -2,12 +2,15 @@
 import re
 from datetime import datetime
 
-from marshmallow import ValidationError, validates
 from marshmallow.validate import OneOf, Range
 
 from ipet.ext.customer.models import AssocProductCustomer, Customer
 from ipet.ext.libs import ma
-from ipet.ext.libs.ma_schemas import PaginateQueryParamsSchema, ResponsePaginateSchema
+from ipet.ext.libs.ma_schemas import (
+    ExportQueryParamsSchema,
+    PaginateQueryParamsSchema,
+    ResponsePaginateSchema,
+)
 from ipet.ext.product.schemas import ProductSchema
 
 STATUS_CHOICE = ("ACTIVE", "BLOCKED", "REMOVED")
@@ -40,15 +43,6 @@ class CustomerSchema(ma.SQLAlchemySchema):
     address = ma.auto_field()
     created_at = ma.auto_field(dump_only=True, data_key="createdAt")
 
-    @validates("cpf")
-    def unique(self, value):
-        """Ensure that there is no duplication of CPF."""
-        if (
-            self.context.get("custom_validate")
-            and Customer.query.filter(Customer.cpf == value).first()
-        ):
-            raise ValidationError("CPF already registered")
-
 
 class CustomerListSchema(ResponsePaginateSchema):
     """Data schema for customer list."""
@@ -56,12 +50,20 @@ class CustomerListSchema(ResponsePaginateSchema):
     elements = ma.List(ma.Nested(CustomerReadSchema))
 
 
-class CustomersQuerySchema(PaginateQueryParamsSchema):
-    """Data schema for query params, used in customer queries that require pagination."""
+class CustomersFilterSchema(ma.Schema):
+    """Data schema for query params, used as customer filters."""
 
     full_name = ma.String(missing=None, description="Full customer name")
 
 
+class CustomersQuerySchema(PaginateQueryParamsSchema, CustomersFilterSchema):
+    """Data schema for query params, used in customer queries that require pagination."""
+
+
+class CustomersExportQuerySchema(ExportQueryParamsSchema, CustomersFilterSchema):
+    """Data schema for query params, used in customer exports."""
+
+
 class ProductStatusSchema(ma.SQLAlchemySchema):
     """Data schema to change status only. Created for correct view in apispec."""
 
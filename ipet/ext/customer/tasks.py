@@ -1,51 +1,56 @@
 """Module that performs client package tasks."""
-import asyncio
 from logging import Logger
-from pathlib import Path
 
-import aiofiles
 from flask_apscheduler import APScheduler
-from scp import SCPClient
 
 from ipet.ext.config import environment_var
-from ipet.ext.customer.models import AssocProductCustomer, Customer
-from ipet.ext.customer.schemas import ProductCustomerSchema
-from ipet.ext.libs.ssh import create_ssh_client
-from ipet.ext.product.models import Product
+from ipet.ext.customer.checkpoint import OfflineCheckpoint
+from ipet.ext.customer.ingestion import ingest_lines
+from ipet.ext.libs.job_lock import exclusive_job
+from ipet.ext.libs.ssh import RemoteLineReader, detect_compression, ssh_pool
 
 
-async def read_base_offline(filename: str, logger: Logger):
-    """Read validates and saves, offline database record.
+def sync_offline_base(remote, path: str, logger: Logger):
+    """Import the records added to the offline database since the last run.
+
+    Plain files resume from the stored checkpoint, which only moves past the
+    chunks that were committed. A last line without line break is imported
+    once the file size is the same as in the previous run, that is, once the
+    file stopped growing. Compressed files are read whole, since their offsets
+    can not be resumed.
 
     Args:
-        filename (str): Offline database file name
-        logger (Logger): Logger instance
+        remote (SFTPFile): Offline database, opened in binary mode.
+        path (str): Offline database path, in the SSH server.
+        logger (Logger): Logger instance.
+
+    Returns:
+        IngestionReport: Import counters, or None when there was nothing new.
     """
-    async with aiofiles.open(filename, mode="r") as f:
-        async for line in f:
-            try:
-                data = ProductCustomerSchema.normalize_data_list(line.split("|"))
-            except ValueError as exp:
-                logger.error(exp.args[0])
-            if not AssocProductCustomer.query.filter(
-                AssocProductCustomer.customer_id == data[0],
-                AssocProductCustomer.product_id == data[1],
-            ).first():
-                customer = Customer.query.get(data[0])
-                product = Product.query.get(data[1])
-                if customer and product:
-                    ass = AssocProductCustomer(
-                        customer=customer, product=product, created_at=data[2]
-                    )
-                    ass.save()
-                else:
-                    logger.error(
-                        f"ID not found: product_id {data[1]}, customer_id {data[0]}"
-                    )
-            else:
-                logger.info(
-                    f"Customer already owns this product: product_id {data[1]}, customer_id {data[0]}"
-                )
+    compression = detect_compression(path, environment_var.DB_FILE_COMPRESSION)
+    checkpoint = OfflineCheckpoint(path).load()
+    stat = remote.stat()
+    size, mtime = stat.st_size, stat.st_mtime
+    start = 0
+    if not compression:
+        start = checkpoint.resume_offset(remote, size, mtime)
+        if checkpoint.offset and not start:
+            logger.info("Offline database changed, importing it from the beginning")
+    if start == size:
+        return None
+    complete = size == checkpoint.size
+    lines = RemoteLineReader(remote, size, start, compression, complete)
+    committed = [start]
+    report = ingest_lines(
+        lines,
+        logger,
+        environment_var.OFFLINE_CHUNK_SIZE,
+        on_commit=lambda: committed.append(lines.offset),
+    )
+    offset = committed[-1]
+    if not compression and (offset > start or not complete):
+        checkpoint.save(offset, checkpoint.window_digest(remote, offset), size, mtime)
+    return report
 
 
 def register_tasks(scheduler: APScheduler):
@@ -56,26 +61,21 @@ def register_tasks(scheduler: APScheduler):
     """
 
     @scheduler.task(
-        "interval", id="task_get_product_customer", seconds=20, misfire_grace_time=900
+        "interval",
+        id="task_get_product_customer",
+        seconds=20,
+        misfire_grace_time=900,
+        max_instances=1,
+        coalesce=True,
     )
+    @exclusive_job(scheduler, "task_get_product_customer")
     def task_get_product_customer():
         with scheduler.app.app_context():
-            ssh = create_ssh_client(
+            path = environment_var.DB_FILE_PATH
+            with ssh_pool.sftp(
                 environment_var.SSH_HOST,
                 environment_var.SSH_PORT,
                 environment_var.SSH_USER,
                 environment_var.SSH_PASSWORD,
-            )
-            filename = Path(environment_var.DB_FILE_PATH).name
-            try:
-                with SCPClient(ssh.get_transport()) as scp:
-                    scp.get(
-                        environment_var.DB_FILE_PATH,
-                        filename,
-                    )
-                scheduler.app.logger.info("File created")
-            except:
-                scheduler.app.logger.exception("Error collecting file")
-            finally:
-                ssh.close()
-            asyncio.run(read_base_offline(filename, scheduler.app.logger))
+            ) as sftp, sftp.open(path, "rb") as remote:
+                sync_offline_base(remote, path, scheduler.app.logger)
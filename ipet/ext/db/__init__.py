@@ -8,10 +8,21 @@ db_redis = FlaskRedis()
 
 
 def init_app(app: Flask):
-    """Initialize component instances.
+    """Initialize component instances, with the pool profile of the process role.
+
+    With ``UNIT_OF_WORK_PER_REQUEST`` each request commits its writes once,
+    after the view.
 
     Args:
         app (Flask): Aplication instance.
     """
+    from ipet.ext.db import transaction
+    from ipet.ext.db.pool import configure_pool
+
+    configure_pool(app)
     db.init_app(app)
     db_redis.init_app(app)
+    if app.config.get("UNIT_OF_WORK_PER_REQUEST", False):
+        app.before_request(transaction.begin_request)
+        app.after_request(transaction.commit_request)
+        app.teardown_request(transaction.end_request)
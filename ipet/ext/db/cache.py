@@ -0,0 +1,195 @@
+"""Module with the read-through cache of serialized entities, kept in Redis.
+
+Entities written through the session are invalidated when the transaction
+commits, so a unit of work never leaves stale entries behind. Each
+invalidation bumps a version of the entity; a body read from the database is
+only stored if the version did not change since before the read, so a write
+committed meanwhile is not overwritten by the older body.
+"""
+from hashlib import sha1
+
+from flask import current_app, request
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+
+from ipet.ext.db import db, db_redis
+
+SET_IF_VERSION_SCRIPT = """
+if (redis.call("get", KEYS[2]) or "0") == ARGV[1] then
+    return redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+end
+return 0
+"""
+
+
+class EntityCache:
+    """Serialized JSON of single entities, keyed by table and identifier."""
+
+    KEY = "entity:{table}:{id}"
+    VERSION_KEY = "entity_version:{table}:{id}"
+    VERSION_TTL = 86400
+    STATS_KEY = "entity_cache:stats"
+
+    @classmethod
+    def key(cls, ClassModel, id) -> str:
+        """Return the Redis key of an entity.
+
+        Args:
+            ClassModel: Data model class.
+            id: Element identifier.
+
+        Returns:
+            str: Redis key.
+        """
+        return cls.KEY.format(table=ClassModel.__tablename__, id=id)
+
+    @classmethod
+    def version_key(cls, ClassModel, id) -> str:
+        """Return the Redis key of the version of an entity.
+
+        Args:
+            ClassModel: Data model class.
+            id: Element identifier.
+
+        Returns:
+            str: Redis key.
+        """
+        return cls.VERSION_KEY.format(table=ClassModel.__tablename__, id=id)
+
+    @staticmethod
+    def ttl() -> int:
+        """Return the entry lifetime, in seconds. Zero disables the cache."""
+        return current_app.config.get("ENTITY_CACHE_TTL", 0)
+
+    @classmethod
+    def get(cls, ClassModel, id):
+        """Read an entity, counting hits and misses.
+
+        Args:
+            ClassModel: Data model class.
+            id: Element identifier.
+
+        Returns:
+            Serialized entity, or None when it is not cached.
+        """
+        if not cls.ttl():
+            return None
+        try:
+            body = db_redis.get(cls.key(ClassModel, id))
+            db_redis.hincrby(cls.STATS_KEY, "misses" if body is None else "hits", 1)
+        except RedisError:
+            current_app.logger.exception("Error reading entity cache")
+            return None
+        return body
+
+    @classmethod
+    def version(cls, ClassModel, id):
+        """Read the version of an entity, to be passed to ``set``.
+
+        Args:
+            ClassModel: Data model class.
+            id: Element identifier.
+
+        Returns:
+            str: Version, or None when the cache is disabled or unreachable.
+        """
+        if not cls.ttl():
+            return None
+        try:
+            return (db_redis.get(cls.version_key(ClassModel, id)) or b"0").decode()
+        except RedisError:
+            current_app.logger.exception("Error reading entity cache")
+            return None
+
+    @classmethod
+    def set(cls, ClassModel, id, body: bytes, version: str):
+        """Store a serialized entity, unless it was invalidated since ``version``.
+
+        Args:
+            ClassModel: Data model class.
+            id: Element identifier.
+            body (bytes): Serialized entity.
+            version (str): Version read before the entity was loaded.
+        """
+        if not cls.ttl() or version is None:
+            return
+        try:
+            db_redis.eval(
+                SET_IF_VERSION_SCRIPT,
+                2,
+                cls.key(ClassModel, id),
+                cls.version_key(ClassModel, id),
+                version,
+                body,
+                cls.ttl(),
+            )
+        except RedisError:
+            current_app.logger.exception("Error writing entity cache")
+
+    @classmethod
+    def invalidate(cls, ClassModel, id):
+        """Remove an entity from the cache and bump its version.
+
+        Args:
+            ClassModel: Data model class.
+            id: Element identifier.
+        """
+        version_key = cls.version_key(ClassModel, id)
+        try:
+            pipeline = db_redis.pipeline()
+            pipeline.incr(version_key)
+            pipeline.expire(version_key, cls.VERSION_TTL)
+            pipeline.delete(cls.key(ClassModel, id))
+            pipeline.execute()
+        except RedisError:
+            current_app.logger.exception("Error invalidating entity cache")
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Return the hit and miss counters.
+
+        Returns:
+            dict: Counter values by name.
+        """
+        data = db_redis.hgetall(cls.STATS_KEY)
+        return {key.decode(): int(value) for key, value in data.items()}
+
+
+def conditional_response(body: bytes):
+    """Build a JSON response with a strong ETag, answering 304 when it is unchanged.
+
+    Args:
+        body (bytes): Serialized JSON.
+
+    Returns:
+        Response: Response with status 200 or 304.
+    """
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(sha1(body).hexdigest())
+    return response.make_conditional(request)
+
+
+@event.listens_for(db.session, "after_flush")
+def collect_written_entities(session, flush_context):
+    """Remember the entities changed or deleted in the transaction."""
+    written = session.info.setdefault("written_entities", set())
+    for element in (*session.dirty, *session.deleted):
+        identity = inspect(element).identity
+        if identity is not None:
+            written.add((type(element), identity))
+
+
+@event.listens_for(db.session, "after_commit")
+def invalidate_written_entities(session):
+    """Invalidate the cached entities written in the transaction, once it commits."""
+    if session.in_nested_transaction():
+        return
+    for ClassModel, identity in session.info.pop("written_entities", ()):
+        EntityCache.invalidate(ClassModel, *identity)
+
+
+@event.listens_for(db.session, "after_rollback")
+def forget_written_entities(session):
+    """Discard the entities written in a transaction that was rolled back."""
+    if not session.in_nested_transaction():
+        session.info.pop("written_entities", None)
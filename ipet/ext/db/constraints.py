@@ -0,0 +1,62 @@
+"""Module that brings the unique constraints of the models to existing databases.
+
+``ManagementMixin.insert_element`` relies on ``ON CONFLICT DO NOTHING``, so the
+unique constraints must exist in the database. ``create_all`` never alters
+existing tables, so constraints added to a model later are created here as
+unique indexes, which ``ON CONFLICT`` uses the same way.
+"""
+from sqlalchemy import UniqueConstraint, inspect
+
+from ipet.ext.db import db
+
+
+def missing_unique_constraints() -> list:
+    """List the named unique constraints of the models absent from the database.
+
+    A unique constraint or unique index over the same columns counts as present.
+
+    Returns:
+        list: UniqueConstraint instances.
+    """
+    inspector = inspect(db.engine)
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {
+            tuple(constraint["column_names"])
+            for constraint in inspector.get_unique_constraints(table.name)
+        } | {
+            tuple(index["column_names"])
+            for index in inspector.get_indexes(table.name)
+            if index["unique"]
+        }
+        for constraint in table.constraints:
+            if (
+                isinstance(constraint, UniqueConstraint)
+                and constraint.name
+                and tuple(constraint.columns.keys()) not in existing
+            ):
+                missing.append(constraint)
+    return missing
+
+
+def create_unique_indexes() -> list:
+    """Create a unique index for each unique constraint missing from the database.
+
+    Fails when the table already holds duplicated values, which must then be
+    removed by hand.
+
+    Returns:
+        list: Names of the indexes created.
+    """
+    created = []
+    for constraint in missing_unique_constraints():
+        columns = ", ".join(constraint.columns.keys())
+        db.session.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {constraint.name} "
+            f"ON {constraint.table.name} ({columns})"
+        )
+        created.append(constraint.name)
+    db.session.commit()
+    return created
@@ -0,0 +1,170 @@
+"""Module with the strategies used to count the elements of paginated queries."""
+from hashlib import sha1
+
+from flask import current_app
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.sql.util import find_tables
+
+from ipet.ext.db import db, db_redis
+
+EXACT = "exact"
+ESTIMATED = "estimated"
+CACHED = "cached"
+GENERATION_KEY = "count:generation:{table}"
+
+
+def exact_count(query) -> int:
+    """Count with ``COUNT(*)``.
+
+    Args:
+        query: SQLAlchemy query.
+
+    Returns:
+        int: Number of rows.
+    """
+    return query.order_by(None).count()
+
+
+def estimated_count(query, filtered: bool):
+    """Take the PostgreSQL planner estimate of the number of rows.
+
+    Unfiltered queries use the table statistics (``reltuples``), the others the
+    row estimate of ``EXPLAIN``.
+
+    Args:
+        query: SQLAlchemy query.
+        filtered (bool): Whether filters or joins were applied to the query.
+
+    Returns:
+        Estimated number of rows, or None when there is no estimate.
+    """
+    if db.engine.dialect.name != "postgresql":
+        return None
+    connection = db.session.connection()
+    if not filtered:
+        table = query.column_descriptions[0]["entity"].__table__.name
+        rows = connection.exec_driver_sql(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%(table)s)",
+            {"table": table},
+        ).scalar()
+        return rows if rows is not None and rows >= 0 else None
+    compiled = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def query_tables(query) -> list:
+    """Return the names of the tables read by a query.
+
+    Args:
+        query: SQLAlchemy query.
+
+    Returns:
+        list: Sorted table names.
+    """
+    return sorted({table.name for table in find_tables(query.statement)})
+
+
+def cached_count(query) -> int:
+    """Count with ``COUNT(*)``, memoized in Redis by query fingerprint.
+
+    The key holds the write generation of every table read by the query, so a
+    write to any of them makes the cached value unreachable.
+
+    Args:
+        query: SQLAlchemy query.
+
+    Returns:
+        int: Number of rows.
+    """
+    tables = query_tables(query)
+    generations = db_redis.mget(
+        [GENERATION_KEY.format(table=table) for table in tables]
+    )
+    compiled = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+    fingerprint = sha1(
+        f"{compiled}|{sorted(compiled.params.items())}|{generations}".encode()
+    ).hexdigest()
+    key = f"count:{'+'.join(tables)}:{fingerprint}"
+    cached = db_redis.get(key)
+    if cached is not None:
+        return int(cached)
+    total = exact_count(query)
+    db_redis.set(key, total, ex=current_app.config.get("COUNT_CACHE_TTL", 60))
+    return total
+
+
+def count(query, strategy: str = EXACT, filtered: bool = True):
+    """Count the rows of a query with the chosen strategy.
+
+    Args:
+        query: SQLAlchemy query.
+        strategy (str, optional): "exact", "estimated" or "cached". Defaults to "exact".
+        filtered (bool, optional): Whether filters or joins were applied. Defaults to True.
+
+    Returns:
+        tuple: Number of rows and the strategy that actually produced it.
+    """
+    if strategy == ESTIMATED:
+        total = estimated_count(query, filtered)
+        if total is not None:
+            return total, ESTIMATED
+    if strategy == CACHED:
+        return cached_count(query), CACHED
+    return exact_count(query), EXACT
+
+
+def invalidate_counts(*tables: str):
+    """Make the cached counts of queries over the tables unreachable.
+
+    Args:
+        tables (str): Table names.
+    """
+    for table in tables:
+        db_redis.incr(GENERATION_KEY.format(table=table))
+
+
+def mark_written(session, *tables: str):
+    """Remember tables written by Core statements, which the flush does not see.
+
+    Args:
+        session: SQLAlchemy session.
+        tables (str): Table names.
+    """
+    session.info.setdefault("written_tables", set()).update(tables)
+
+
+@event.listens_for(db.session, "after_flush")
+def collect_written_tables(session, flush_context):
+    """Remember the tables written in the transaction."""
+    mark_written(
+        session,
+        *(
+            element.__table__.name
+            for element in (*session.new, *session.dirty, *session.deleted)
+        ),
+    )
+
+
+@event.listens_for(db.session, "after_commit")
+def invalidate_written_tables(session):
+    """Invalidate the cached counts of the tables written in the transaction."""
+    if session.in_nested_transaction():
+        return
+    written = session.info.pop("written_tables", None)
+    if not written:
+        return
+    try:
+        invalidate_counts(*written)
+    except RedisError:
+        current_app.logger.exception("Error invalidating cached counts")
+
+
+@event.listens_for(db.session, "after_rollback")
+def forget_written_tables(session):
+    """Discard the tables written in a transaction that was rolled back."""
+    if not session.in_nested_transaction():
+        session.info.pop("written_tables", None)
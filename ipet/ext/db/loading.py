@@ -0,0 +1,69 @@
+"""Module that derives eager loading from the schemas used to serialize models.
+
+Every ``Nested`` field of a schema that maps a relationship of the model
+becomes a loader option: ``joinedload`` for many-to-one relationships and
+``selectinload`` for collections, recursively. Serializing nested data then
+costs a fixed number of queries, whatever the number of elements.
+"""
+from marshmallow import Schema, fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def nested_schema(field):
+    """Return the schema nested by a field, or None for plain fields.
+
+    Args:
+        field: Marshmallow field.
+
+    Returns:
+        Nested schema instance, or None.
+    """
+    if isinstance(field, fields.List):
+        field = field.inner
+    if isinstance(field, fields.Nested) and isinstance(field.schema, Schema):
+        return field.schema
+    return None
+
+
+def loader_options(Model, schema: Schema, parent=None) -> list:
+    """Build the loader options that eager load the nested fields of a schema.
+
+    Args:
+        Model: Data model class serialized by the schema.
+        schema (Schema): Data schema instance.
+        parent (optional): Loader option of the enclosing relationship. Defaults to None.
+
+    Returns:
+        list: Loader options, to be passed to ``query.options``.
+    """
+    relationships = inspect(Model).relationships
+    options = []
+    for name, field in schema.dump_fields.items():
+        nested = nested_schema(field)
+        relationship = relationships.get(field.attribute or name)
+        if nested is None or relationship is None:
+            continue
+        attribute = getattr(Model, relationship.key)
+        loader = selectinload if relationship.uselist else joinedload
+        option = (
+            loader(attribute)
+            if parent is None
+            else getattr(parent, loader.__name__)(attribute)
+        )
+        options.append(option)
+        options += loader_options(relationship.mapper.class_, nested, option)
+    return options
+
+
+def element_schema(list_schema: Schema) -> Schema:
+    """Return the schema of the elements of a paginated list schema.
+
+    Args:
+        list_schema (Schema): Data schema instance with an ``elements`` field.
+
+    Returns:
+        Schema: Element schema, or the list schema itself when it has no elements.
+    """
+    field = list_schema.fields.get("elements")
+    return (field and nested_schema(field)) or list_schema
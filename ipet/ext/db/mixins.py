@@ -1,11 +1,61 @@
 """Auxiliary module for writing in database."""
 from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.exceptions import InternalServerError
+from sqlalchemy import inspect, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from werkzeug.exceptions import BadRequest, InternalServerError
+
+from ipet.ext.db.counting import mark_written
+from ipet.ext.db.transaction import in_unit_of_work, savepoint, write_scope
+
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    """Check whether an integrity error comes from a unique constraint.
+
+    Args:
+        error (IntegrityError): Error raised by the database.
+
+    Returns:
+        bool: Whether a unique constraint was violated.
+    """
+    return getattr(error.orig, "pgcode", None) == "23505" or (
+        "UNIQUE constraint failed" in str(error.orig)
+    )
+
+
+def unique_violation(element) -> BadRequest:
+    """Build the validation error of an element that violates a unique constraint.
+
+    Args:
+        element: Element that was not saved.
+
+    Returns:
+        BadRequest: Error with the uniqueness messages of the model.
+    """
+    return BadRequest(
+        type(element).__unique_message__ or {"_schema": ["Element already exists"]}
+    )
 
 
 class ManagementMixin:
-    """Class to be inherited by models, for saving and deleting elements."""
+    """Class to be inherited by models, for saving and deleting elements.
+
+    Each write commits, unless a unit of work is open (see
+    ``ipet.ext.db.transaction``): then it runs in a savepoint and is only
+    flushed, to be committed with the unit.
+
+    Models may declare ``__unique_fields__``, groups of columns whose values
+    must be unique together (backed by unique constraints in the database),
+    and ``__unique_message__``, the validation messages reported when they
+    are not.
+    """
+
+    __unique_fields__ = ()
+    __unique_message__ = {}
 
     @staticmethod
     def __get_db() -> SQLAlchemy:
@@ -29,11 +79,10 @@ class ManagementMixin:
         """
         db = cls.__get_db()
         try:
-            db.session.delete(element)
-            db.session.commit()
+            with write_scope(db.session):
+                db.session.delete(element)
         except Exception as exp:
             current_app.logger.exception("Error deleting element")
-            db.session.rollback()
             raise InternalServerError(error_msg or "Internal Error")
 
     @classmethod
@@ -45,6 +94,7 @@ class ManagementMixin:
             error_msg (str, optional): Error message to be reported. Defaults to None.
 
         Raises:
+            BadRequest: A unique constraint was violated.
             InternalServerError: There was an error in the save process.
 
         Returns:
@@ -52,13 +102,17 @@ class ManagementMixin:
         """
         db = cls.__get_db()
         try:
-            db.session.add(element)
-            db.session.commit()
-            return element
+            with write_scope(db.session):
+                db.session.add(element)
+        except IntegrityError as exp:
+            if not is_unique_violation(exp):
+                current_app.logger.exception("Error saving element")
+                raise InternalServerError(error_msg or "Internal Error")
+            raise unique_violation(element)
         except Exception as exp:
             current_app.logger.exception("Error saving element")
-            db.session.rollback()
             raise InternalServerError(error_msg or "Internal Error")
+        return element
 
     def save(self, error_msg: str = None):
         """Save the instance itself.
@@ -70,3 +124,162 @@ class ManagementMixin:
             Return the saved and updated instance.
         """
         return self.save_element(self, error_msg)
+
+    @classmethod
+    def insert_element(cls, element, error_msg: str = None):
+        """Insert a new element with ``INSERT ... ON CONFLICT DO NOTHING``.
+
+        The unique constraints are checked by the write itself, so there is no
+        previous query and no window for a concurrent insert. Dialects without
+        ``ON CONFLICT`` fall back to ``save_element``.
+
+        Args:
+            element: Transient element to be inserted.
+            error_msg (str, optional): Error message to be reported. Defaults to None.
+
+        Raises:
+            BadRequest: A unique constraint was violated.
+            InternalServerError: There was an error in the save process.
+
+        Returns:
+            Return the inserted element.
+        """
+        db = cls.__get_db()
+        insert = UPSERT_INSERTS.get(db.engine.dialect.name)
+        if insert is None:
+            return cls.save_element(element, error_msg)
+        mapper = inspect(type(element))
+        values = {
+            attr.columns[0].key: getattr(element, attr.key)
+            for attr in mapper.column_attrs
+            if getattr(element, attr.key) is not None
+        }
+        try:
+            with write_scope(db.session):
+                result = db.session.execute(
+                    insert(mapper.local_table).values(values).on_conflict_do_nothing()
+                )
+                inserted = result.rowcount
+                if inserted:
+                    mark_written(db.session, mapper.local_table.name)
+                    for attr, value in zip(
+                        mapper.primary_key, result.inserted_primary_key
+                    ):
+                        setattr(element, attr.key, value)
+                    make_transient_to_detached(element)
+                    db.session.add(element)
+        except Exception as exp:
+            current_app.logger.exception("Error saving element")
+            raise InternalServerError(error_msg or "Internal Error")
+        if not inserted:
+            raise unique_violation(element)
+        return element
+
+    @classmethod
+    def find_conflicts(cls, elements: dict) -> dict:
+        """Check the uniqueness of many elements, with one query per group of unique fields.
+
+        Elements repeating values of an earlier element of the batch conflict too.
+
+        Args:
+            elements (dict): Elements to be saved, by batch index.
+
+        Returns:
+            dict: Validation messages, by batch index of the conflicting elements.
+        """
+        db = cls.__get_db()
+        conflicts = {}
+        for fields in cls.__unique_fields__:
+            columns = [getattr(cls, field) for field in fields]
+            values = {
+                index: tuple(getattr(element, field) for field in fields)
+                for index, element in elements.items()
+            }
+            if not values:
+                continue
+            with db.session.no_autoflush:
+                stored = {
+                    tuple(row[1:]): row[0]
+                    for row in db.session.query(cls.id, *columns).filter(
+                        tuple_(*columns).in_(set(values.values()))
+                    )
+                }
+            seen = set()
+            for index, value in values.items():
+                stored_id = stored.get(value)
+                if value in seen or (
+                    stored_id is not None and stored_id != elements[index].id
+                ):
+                    conflicts[index] = cls.__unique_message__
+                seen.add(value)
+        return conflicts
+
+    @classmethod
+    def save_all(cls, elements: list, error_msg: str = None):
+        """Save many elements in a single transaction.
+
+        Args:
+            elements (list): Elements to be saved.
+            error_msg (str, optional): Error message to be reported. Defaults to None.
+
+        Raises:
+            BadRequest: A unique constraint was violated.
+            InternalServerError: There was an error in the save process.
+        """
+        db = cls.__get_db()
+        try:
+            with write_scope(db.session):
+                db.session.add_all(elements)
+        except IntegrityError as exp:
+            if not is_unique_violation(exp):
+                current_app.logger.exception("Error saving elements")
+                raise InternalServerError(error_msg or "Internal Error")
+            raise unique_violation(elements[0])
+        except Exception as exp:
+            current_app.logger.exception("Error saving elements")
+            raise InternalServerError(error_msg or "Internal Error")
+
+    @classmethod
+    def save_each(cls, elements: dict) -> dict:
+        """Save many elements in one transaction, with a savepoint per element.
+
+        Inside a unit of work the transaction is the unit's.
+
+        Args:
+            elements (dict): Elements to be saved, by batch index.
+
+        Returns:
+            dict: Error messages, by batch index of the elements that failed.
+        """
+        db = cls.__get_db()
+        errors = {}
+        for index, element in elements.items():
+            try:
+                with savepoint(db.session):
+                    db.session.add(element)
+            except IntegrityError as exp:
+                if is_unique_violation(exp):
+                    errors[index] = unique_violation(element).description
+                    continue
+                current_app.logger.exception("Error saving element")
+                errors[index] = {"_schema": ["Error saving element"]}
+            except Exception as exp:
+                current_app.logger.exception("Error saving element")
+                errors[index] = {"_schema": ["Error saving element"]}
+        if not in_unit_of_work(db.session):
+            db.session.commit()
+        return errors
+
+    @classmethod
+    def discard_changes(cls, *elements):
+        """Drop the unsaved changes of elements, so the next commit leaves them out.
+
+        Args:
+            elements: Elements to be discarded.
+        """
+        db = cls.__get_db()
+        for element in elements:
+            if inspect(element).persistent:
+                db.session.expire(element)
+            elif element in db.session:
+                db.session.expunge(element)
@@ -0,0 +1,115 @@
+"""Module that configures the database pool of each process role.
+
+``DB_POOL_PROFILES`` holds one profile per role (``api`` and ``worker``):
+
+- ``pool_size``, ``max_overflow``, ``pool_timeout``, ``pool_recycle`` and
+  ``pool_pre_ping``: SQLAlchemy pool options.
+- ``statement_timeout`` and ``lock_timeout``: PostgreSQL timeouts, in
+  milliseconds. Zero keeps the server default.
+
+With ``DB_PGBOUNCER`` set, the connections go through PgBouncer in
+transaction mode, which does not keep session state between transactions.
+The timeouts are then set with ``SET LOCAL`` at the start of each
+transaction instead of as startup parameters, and nothing else relies on
+session state: psycopg2 never prepares statements on the server.
+"""
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from ipet.ext.db import db
+
+POOL_OPTIONS = (
+    "pool_size",
+    "max_overflow",
+    "pool_timeout",
+    "pool_recycle",
+    "pool_pre_ping",
+)
+TIMEOUTS = ("statement_timeout", "lock_timeout")
+DEFAULT_PROFILE = "api"
+
+
+def profile_name(app: Flask) -> str:
+    """Return the pool profile of the process role, falling back to ``api``.
+
+    Args:
+        app (Flask): Aplication instance.
+
+    Returns:
+        str: Profile name.
+    """
+    role = app.config.get("PROCESS_ROLE", DEFAULT_PROFILE)
+    profiles = app.config.get("DB_POOL_PROFILES") or {}
+    return role if role in profiles else DEFAULT_PROFILE
+
+
+def configure_pool(app: Flask, name: str = None):
+    """Apply a pool profile to the engine options, before the engine is created.
+
+    SQLite keeps its options: it has no server to share connections with.
+
+    Args:
+        app (Flask): Aplication instance.
+        name (str, optional): Profile name. Defaults to the profile of the role.
+    """
+    name = name or profile_name(app)
+    profile = dict((app.config.get("DB_POOL_PROFILES") or {}).get(name) or {})
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    app.extensions["db_pool_profile"] = {"name": name, **profile}
+    if uri.startswith("sqlite"):
+        return
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    options.update({key: profile[key] for key in POOL_OPTIONS if key in profile})
+    connect_args = dict(options.get("connect_args") or {})
+    connect_args.pop("options", None)
+    pgbouncer = app.config.get("DB_PGBOUNCER", False)
+    timeouts = [
+        f"-c {key}={profile[key]}"
+        for key in TIMEOUTS
+        if profile.get(key) and uri.startswith("postgresql")
+    ]
+    if timeouts and not pgbouncer:
+        connect_args["options"] = " ".join(timeouts)
+    options["connect_args"] = connect_args
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+@event.listens_for(db.session, "after_begin")
+def set_local_timeouts(session, transaction, connection):
+    """Set the profile timeouts in each transaction, when behind PgBouncer."""
+    if (
+        not has_app_context()
+        or connection.dialect.name != "postgresql"
+        or not current_app.config.get("DB_PGBOUNCER", False)
+    ):
+        return
+    profile = current_app.extensions.get("db_pool_profile", {})
+    for key in TIMEOUTS:
+        if profile.get(key):
+            connection.exec_driver_sql(f"SET LOCAL {key} = {int(profile[key])}")
+
+
+def pool_status() -> dict:
+    """Return the usage of the database pool of this process.
+
+    Returns:
+        dict: Profile, pool counters and checkout wait times.
+    """
+    pool = db.engine.pool
+    status = {
+        "profile": current_app.extensions.get("db_pool_profile", {}).get("name"),
+        "pool": type(pool).__name__,
+    }
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    if hasattr(pool, "wait_stats"):
+        status["checkout_wait"] = pool.wait_stats()
+    return status
@@ -0,0 +1,187 @@
+"""Module with the text search backends used by the list filters.
+
+- ``ilike``: ``ILIKE '%term%'``, without index support.
+- ``trigram``: substring search. PostgreSQL keeps ``ILIKE`` and answers it from
+  ``pg_trgm`` GIN indexes; SQLite uses an FTS5 table with the trigram tokenizer.
+- ``fulltext``: word prefix search, every word of the term being the prefix of
+  a word of the column. PostgreSQL matches ``tsvector`` expression indexes with
+  ``word:*`` queries, ranking by ``ts_rank``; SQLite uses an FTS5 table with
+  ``"word"*`` queries.
+
+Indexed columns are declared by the models in ``__searchable__``.
+"""
+from sqlalchemy import column, func, literal_column, select, table
+
+from ipet.ext.db import db
+
+ILIKE = "ilike"
+TRIGRAM = "trigram"
+FULLTEXT = "fulltext"
+TS_CONFIG = "simple"
+REGCONFIG = literal_column(f"'{TS_CONFIG}'::regconfig")
+
+
+def searchable_models() -> list:
+    """Return the models that declare searchable columns."""
+    return [
+        mapper.class_
+        for mapper in db.Model.registry.mappers
+        if getattr(mapper.class_, "__searchable__", None)
+    ]
+
+
+def dialect() -> str:
+    """Return the name of the database dialect in use."""
+    return db.engine.dialect.name
+
+
+def fts_table(Model) -> str:
+    """Return the name of the SQLite FTS5 table of a model."""
+    return f"{Model.__tablename__}_fts"
+
+
+def fts_query(term: str) -> str:
+    """Build an FTS5 query that matches every word of a term as a prefix.
+
+    Args:
+        term (str): Searched text.
+
+    Returns:
+        str: FTS5 query.
+    """
+    words = [word.replace('"', '""') for word in term.split()]
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def ts_prefix_query(term: str) -> str:
+    """Build a PostgreSQL ``tsquery`` that matches every word of a term as a prefix.
+
+    Args:
+        term (str): Searched text.
+
+    Returns:
+        str: Text for ``to_tsquery``, with each word quoted.
+    """
+    words = [word.replace("\\", "\\\\").replace("'", "''") for word in term.split()]
+    return " & ".join(f"'{word}':*" for word in words)
+
+
+def condition(field, term: str, backend: str = ILIKE):
+    """Build the filter clause of a search.
+
+    Args:
+        field: Model column (InstrumentedAttribute).
+        term (str): Searched text.
+        backend (str, optional): "ilike", "trigram" or "fulltext". Defaults to "ilike".
+
+    Returns:
+        SQLAlchemy clause.
+    """
+    if backend == ILIKE or (backend == TRIGRAM and dialect() == "postgresql"):
+        return field.ilike(f"%{term}%")
+    if backend == FULLTEXT and dialect() == "postgresql":
+        return func.to_tsvector(REGCONFIG, field).op("@@")(
+            func.to_tsquery(REGCONFIG, ts_prefix_query(term))
+        )
+    Model = field.class_
+    fts = table(fts_table(Model), column("rowid"), column(field.key))
+    if backend == TRIGRAM:
+        match = fts.c[field.key].like(f"%{term}%")
+    else:
+        match = fts.c[field.key].op("MATCH")(fts_query(term))
+    return Model.id.in_(select(fts.c.rowid).where(match))
+
+
+def rank(field, term: str, backend: str = ILIKE) -> list:
+    """Build the ordering of a search by relevance, when the backend has one.
+
+    Args:
+        field: Model column (InstrumentedAttribute).
+        term (str): Searched text.
+        backend (str, optional): "ilike", "trigram" or "fulltext". Defaults to "ilike".
+
+    Returns:
+        list: Order by clauses, empty when results are not ranked.
+    """
+    if backend != FULLTEXT or dialect() != "postgresql":
+        return []
+    return [
+        func.ts_rank(
+            func.to_tsvector(REGCONFIG, field),
+            func.to_tsquery(REGCONFIG, ts_prefix_query(term)),
+        ).desc()
+    ]
+
+
+def create_postgresql_indexes(backend: str):
+    """Create the GIN indexes of the searchable columns, in PostgreSQL.
+
+    Args:
+        backend (str): "trigram" or "fulltext".
+    """
+    if backend == TRIGRAM:
+        db.session.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for Model in searchable_models():
+        for name in Model.__searchable__:
+            index = f"ix_{Model.__tablename__}_{name}_{backend}"
+            expression = (
+                f"{name} gin_trgm_ops"
+                if backend == TRIGRAM
+                else f"to_tsvector('{TS_CONFIG}'::regconfig, {name})"
+            )
+            db.session.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} "
+                f"ON {Model.__tablename__} USING gin ({expression})"
+            )
+
+
+def create_sqlite_indexes(backend: str):
+    """Create the FTS5 tables of the searchable models, kept in sync by triggers.
+
+    Args:
+        backend (str): "trigram" or "fulltext".
+    """
+    tokenizer = "trigram" if backend == TRIGRAM else "unicode61 remove_diacritics 2"
+    for Model in searchable_models():
+        source, fts = Model.__tablename__, fts_table(Model)
+        columns = ", ".join(Model.__searchable__)
+        new = ", ".join(f"new.{name}" for name in Model.__searchable__)
+        old = ", ".join(f"old.{name}" for name in Model.__searchable__)
+        delete = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+        insert = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new});"
+        for statement in (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+            f"content='{source}', content_rowid='id', tokenize='{tokenizer}')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} "
+            f"BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} "
+            f"BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {source} "
+            f"BEGIN {delete} {insert} END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ):
+            db.session.execute(statement)
+
+
+def create_search_indexes(backend: str):
+    """Create the structures used by a search backend.
+
+    Args:
+        backend (str): "ilike", "trigram" or "fulltext".
+    """
+    if backend == ILIKE:
+        return
+    if dialect() == "postgresql":
+        create_postgresql_indexes(backend)
+    elif dialect() == "sqlite":
+        create_sqlite_indexes(backend)
+    db.session.commit()
+
+
+def drop_search_indexes():
+    """Drop the SQLite FTS5 tables, which ``drop_all`` does not know about."""
+    if dialect() != "sqlite":
+        return
+    for Model in searchable_models():
+        db.session.execute(f"DROP TABLE IF EXISTS {fts_table(Model)}")
+    db.session.commit()
@@ -0,0 +1,135 @@
+"""Module with the unit of work: many writes, one commit.
+
+Inside ``with unit_of_work():`` the writes of ``ManagementMixin`` run in
+savepoints and are only flushed, so a failed write undoes just itself, and
+the block commits once when it ends, or rolls back when it raises. Nested
+blocks are savepoints of the outer one.
+
+With ``UNIT_OF_WORK_PER_REQUEST`` each request is a unit of work, committed
+after the view when the response is successful and rolled back otherwise.
+"""
+import json
+from contextlib import contextmanager
+
+from flask import Response, current_app
+
+from ipet.ext.db import db
+
+KEY = "unit_of_work"
+
+
+def savepoint(session):
+    """Open a savepoint, inside a real transaction also in SQLite.
+
+    pysqlite starts no transaction before a ``SAVEPOINT`` and commits when the
+    savepoint is released, so a transaction is begun first when none is open.
+
+    Args:
+        session: SQLAlchemy session.
+
+    Returns:
+        SessionTransaction: Nested transaction, usable as a context manager.
+    """
+    connection = session.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+    return session.begin_nested()
+
+
+def in_unit_of_work(session=None) -> bool:
+    """Check whether a unit of work is open.
+
+    Args:
+        session (optional): SQLAlchemy session. Defaults to the app session.
+
+    Returns:
+        bool: Whether writes must be left for the unit of work to commit.
+    """
+    return (session or db.session).info.get(KEY, 0) > 0
+
+
+@contextmanager
+def unit_of_work():
+    """Group the writes of the block in a single transaction.
+
+    Yields:
+        Session: SQLAlchemy session.
+    """
+    session = db.session
+    if in_unit_of_work(session):
+        with savepoint(session):
+            yield session
+        return
+    session.info[KEY] = 1
+    try:
+        yield session
+        session.info.pop(KEY, None)
+        session.commit()
+    except Exception:
+        session.info.pop(KEY, None)
+        session.rollback()
+        raise
+
+
+@contextmanager
+def write_scope(session):
+    """Run one write of the mixin: a savepoint inside a unit of work, otherwise \
+    a transaction of its own.
+
+    Args:
+        session: SQLAlchemy session.
+    """
+    if in_unit_of_work(session):
+        with savepoint(session):
+            yield
+        return
+    try:
+        yield
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+
+def begin_request():
+    """Open the unit of work of a request."""
+    db.session.info[KEY] = 1
+
+
+def commit_request(response: Response) -> Response:
+    """Commit the unit of work of a successful request, or roll it back.
+
+    Args:
+        response (Response): Response instance.
+
+    Returns:
+        Response: The same response, or an error when the commit failed.
+    """
+    session = db.session
+    if session.info.pop(KEY, None) is None:
+        return response
+    if response.status_code >= 400:
+        session.rollback()
+        return response
+    try:
+        session.commit()
+    except Exception:
+        current_app.logger.exception("Error committing request")
+        session.rollback()
+        return current_app.response_class(
+            json.dumps({"message": "Internal Error"}),
+            status=500,
+            mimetype="application/json",
+        )
+    return response
+
+
+def end_request(exception=None):
+    """Roll back the unit of work of a request that raised.
+
+    Args:
+        exception (Exception, optional): Unhandled exception. Defaults to None.
+    """
+    session = db.session
+    if session.info.pop(KEY, None) is not None:
+        session.rollback()
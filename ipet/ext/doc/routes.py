@@ -1,19 +1,33 @@
 """Module that registers OpenAPI routes."""
-from apispec import APISpec
-from flask import Blueprint, render_template
+from flask import Blueprint, current_app, render_template, request
 
+from ipet.ext.doc.spec import get_document
 
-def register_routes(bp: Blueprint, spec: APISpec):
+
+def register_routes(bp: Blueprint):
     """Register packet routes.
 
     Args:
         bp (Blueprint): Package blueprint instance.
-        spec (APISpec): _description_
     """
 
     @bp.get("/ui.json")
     def swagger_spec_json():
-        return spec.to_dict()
+        document = get_document(current_app)
+        compress = "gzip" in request.accept_encodings
+        response = current_app.response_class(
+            document.gzipped if compress else document.body,
+            mimetype="application/json",
+        )
+        if compress:
+            response.content_encoding = "gzip"
+        response.set_etag(f"{document.etag}-gzip" if compress else document.etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get(
+            "OPENAPI_CACHE_MAX_AGE", 86400
+        )
+        response.vary.add("Accept-Encoding")
+        return response.make_conditional(request)
 
     @bp.get("/ui")
     def swagger_spec_ui():
@@ -0,0 +1,98 @@
+"""Module that builds the OpenAPI document once and keeps it serialized.
+
+apispec is imported by ``build_spec`` only, when the document is first needed.
+"""
+import gzip
+import json
+import os
+import threading
+from hashlib import sha1
+from typing import TYPE_CHECKING
+
+from flask import Flask
+
+if TYPE_CHECKING:
+    from apispec import APISpec
+
+JWT_SCHEME = {"type": "http", "scheme": "bearer", "bearerFormat": "JWT"}
+
+_lock = threading.Lock()
+
+
+class SpecDocument:
+    """OpenAPI document, serialized and gzipped, with its ETag."""
+
+    def __init__(self, body: bytes) -> None:
+        """Keep the serialized document and its compressed copy.
+
+        Args:
+            body (bytes): Document as JSON.
+        """
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = sha1(body).hexdigest()
+
+
+def build_spec(app: Flask) -> "APISpec":
+    """Build the OpenAPI spec from the docstrings of the application resources.
+
+    Args:
+        app (Flask): Aplication instance.
+
+    Returns:
+        APISpec: Spec with every resource mapped.
+    """
+    from apispec import APISpec
+    from apispec.ext.marshmallow import MarshmallowPlugin
+    from apispec_webframeworks.flask import FlaskPlugin
+
+    from ipet.ext.doc.plugins import automatic_mapping
+
+    spec = APISpec(
+        title="iPET-api-documentation",
+        version="1.0.0",
+        openapi_version="3.0.2",
+        plugins=[FlaskPlugin(), MarshmallowPlugin()],
+    )
+    spec.components.security_scheme("jwt", JWT_SCHEME)
+    automatic_mapping(spec, app)
+    return spec
+
+
+def serialize_spec(app: Flask) -> bytes:
+    """Build the OpenAPI spec and serialize it.
+
+    Args:
+        app (Flask): Aplication instance.
+
+    Returns:
+        bytes: Document as JSON.
+    """
+    return json.dumps(build_spec(app).to_dict(), separators=(",", ":")).encode()
+
+
+def get_document(app: Flask) -> SpecDocument:
+    """Return the OpenAPI document of the application, loading it on first use.
+
+    The document is read from ``OPENAPI_SPEC_FILE`` when that file exists,
+    and built from the resource docstrings otherwise.
+
+    Args:
+        app (Flask): Aplication instance.
+
+    Returns:
+        SpecDocument: Serialized document.
+    """
+    document = app.extensions.get("openapi_spec")
+    if document is not None:
+        return document
+    with _lock:
+        if "openapi_spec" not in app.extensions:
+            path = app.config.get("OPENAPI_SPEC_FILE", "")
+            if path and os.path.isfile(path):
+                with open(path, "rb") as file:
+                    body = file.read()
+            else:
+                body = serialize_spec(app)
+            app.extensions["openapi_spec"] = SpecDocument(body)
+    return app.extensions["openapi_spec"]
@@ -0,0 +1,38 @@
+"""Instrumentation package initialization module."""
+from flask import Blueprint, Flask
+
+from ipet.ext.db import db_redis
+from ipet.ext.instrumentation.metrics import (
+    TimedQueuePool,
+    TimedRedis,
+    observe_request,
+    start_timer,
+)
+from ipet.ext.instrumentation.profiler import finish_profile, start_profile
+from ipet.ext.instrumentation.routes import register_routes
+
+bp = Blueprint("instrumentation", __name__, url_prefix="/metrics")
+register_routes(bp)
+
+
+def init_app(app: Flask):
+    """Profile the SQL statements of each request, collect the Prometheus metrics \
+    and register the blueprint.
+
+    Must run before the db extension, which builds the Redis client and the
+    database pool measured here.
+
+    Args:
+        app (Flask): Aplication instance.
+    """
+    if app.config.get("PROMETHEUS_METRICS", True):
+        options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+        options.setdefault("poolclass", TimedQueuePool)
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+        db_redis.provider_class = TimedRedis
+        app.before_request(start_timer)
+        app.after_request(observe_request)
+    if app.config.get("SQL_INSTRUMENTATION", True):
+        app.before_request(start_profile)
+        app.after_request(finish_profile)
+    app.register_blueprint(bp)
@@ -0,0 +1,200 @@
+"""Module with the Prometheus metrics of the application.
+
+Under gunicorn every worker writes its samples to ``PROMETHEUS_MULTIPROC_DIR``
+(see ``gunicorn.conf.py``) and ``/metrics`` aggregates all of them.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from redis import StrictRedis
+from sqlalchemy.pool import QueuePool
+
+REQUEST_LATENCY = Histogram(
+    "ipet_request_duration_seconds",
+    "Request latency, by resource class and method.",
+    ["resource", "method", "status"],
+)
+POOL_WAIT = Histogram(
+    "ipet_db_pool_wait_seconds",
+    "Time waiting for a connection from the database pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+POOL_CHECKED_OUT = Gauge(
+    "ipet_db_pool_checked_out",
+    "Database connections in use.",
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "ipet_db_pool_overflow",
+    "Database connections opened beyond the pool size.",
+    multiprocess_mode="livesum",
+)
+REDIS_LATENCY = Histogram(
+    "ipet_redis_command_duration_seconds",
+    "Redis command latency, by command.",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1),
+)
+SERIALIZATION = Histogram(
+    "ipet_serialization_duration_seconds",
+    "Marshmallow dump time, by schema.",
+    ["schema"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1),
+)
+JOB_DURATION = Histogram(
+    "ipet_job_duration_seconds",
+    "Scheduled job run time, by job.",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800),
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "ipet_password_hash_duration_seconds",
+    "Password hashing time, by operation (generate or check).",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+INGESTED_ROWS = Counter(
+    "ipet_ingested_rows",
+    "Rows of the offline base ingested, by outcome.",
+    ["outcome"],
+)
+
+
+class TimedQueuePool(QueuePool):
+    """Connection pool that measures how long checkouts wait for a connection \
+    and how many connections are in use."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize the pool and its wait totals."""
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self._waits = [0, 0.0, 0.0]
+
+    def _do_get(self):
+        """Take a connection, observing the wait."""
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - start
+            POOL_WAIT.observe(wait)
+            with self._wait_lock:
+                self._waits[0] += 1
+                self._waits[1] += wait
+                self._waits[2] = max(self._waits[2], wait)
+            self._observe_usage()
+
+    def _do_return_conn(self, conn):
+        """Give a connection back, observing the usage."""
+        super()._do_return_conn(conn)
+        self._observe_usage()
+
+    def _observe_usage(self):
+        """Update the usage gauges."""
+        POOL_CHECKED_OUT.set(self.checkedout())
+        POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+    def wait_stats(self) -> dict:
+        """Return the checkout wait totals.
+
+        Returns:
+            dict: Checkouts, and the total, average and longest wait in milliseconds.
+        """
+        with self._wait_lock:
+            count, total, longest = self._waits
+        return {
+            "checkouts": count,
+            "total_ms": round(total * 1000, 3),
+            "average_ms": round(total * 1000 / count, 3) if count else 0.0,
+            "max_ms": round(longest * 1000, 3),
+        }
+
+
+class TimedRedis(StrictRedis):
+    """Redis client that measures the latency of each command."""
+
+    def execute_command(self, *args, **options):
+        """Run a command, observing its latency."""
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            REDIS_LATENCY.labels(str(args[0]).lower()).observe(
+                time.perf_counter() - start
+            )
+
+
+@contextmanager
+def serialization_timer(schema):
+    """Observe the time spent dumping with a schema.
+
+    Args:
+        schema: Data schema instance, or its compiled version.
+    """
+    name = type(getattr(schema, "schema", schema)).__name__
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SERIALIZATION.labels(name).observe(time.perf_counter() - start)
+
+
+def resource_name() -> str:
+    """Return the flask-restful resource class of the request, or its endpoint.
+
+    Returns:
+        str: Resource label.
+    """
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, "view_class", None)
+    return view_class.__name__ if view_class else request.endpoint or "unmatched"
+
+
+def start_timer():
+    """Take the start time of a request."""
+    g.request_start = time.perf_counter()
+
+
+def observe_request(response: Response) -> Response:
+    """Observe the latency of a request.
+
+    Args:
+        response (Response): Response instance.
+
+    Returns:
+        Response: The same response.
+    """
+    start = g.pop("request_start", None)
+    if start is not None:
+        REQUEST_LATENCY.labels(
+            resource_name(), request.method, response.status_code
+        ).observe(time.perf_counter() - start)
+    return response
+
+
+def latest() -> Response:
+    """Expose the metrics of every worker in the Prometheus text format.
+
+    Returns:
+        Response: Metrics response.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return current_app.response_class(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
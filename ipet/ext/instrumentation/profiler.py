@@ -0,0 +1,182 @@
+"""Module that measures the SQL statements run by each request."""
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ipet.ext.db import db_redis
+
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN "}
+
+
+class RequestProfile:
+    """Statements of a request: count, total time and the slowest ones."""
+
+    def __init__(self, slowest: int = 3) -> None:
+        """Initialize an empty profile.
+
+        Args:
+            slowest (int, optional): Number of slowest statements kept. Defaults to 3.
+        """
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_size = slowest
+        self.slowest = []
+
+    def add(self, statement: str, duration: float):
+        """Record a statement.
+
+        Args:
+            statement (str): SQL statement.
+            duration (float): Execution time, in milliseconds.
+        """
+        self.count += 1
+        self.duration += duration
+        self.slowest.append((duration, statement))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[self.slowest_size :]
+
+    def server_timing(self) -> str:
+        """Format the profile as a ``Server-Timing`` header value.
+
+        Returns:
+            str: Header value.
+        """
+        metrics = [f'db;dur={self.duration:.2f};desc="{self.count} queries"']
+        for position, (duration, statement) in enumerate(self.slowest, 1):
+            summary = " ".join(statement.split())[:60].replace('"', "'")
+            metrics.append(f'sql-{position};dur={duration:.2f};desc="{summary}"')
+        return ", ".join(metrics)
+
+
+class SQLMetrics:
+    """SQL totals by endpoint, shared by every process through Redis."""
+
+    KEY = "sql_metrics:{endpoint}"
+    ENDPOINTS_KEY = "sql_metrics:endpoints"
+
+    @classmethod
+    def record(cls, endpoint: str, profile: RequestProfile):
+        """Add the profile of a request to the totals of its endpoint.
+
+        Args:
+            endpoint (str): Method and URL rule.
+            profile (RequestProfile): Request profile.
+        """
+        key = cls.KEY.format(endpoint=endpoint)
+        pipeline = db_redis.pipeline(transaction=False)
+        pipeline.sadd(cls.ENDPOINTS_KEY, endpoint)
+        pipeline.hincrby(key, "requests", 1)
+        pipeline.hincrby(key, "queries", profile.count)
+        pipeline.hincrbyfloat(key, "db_time_ms", profile.duration)
+        pipeline.execute()
+
+    @classmethod
+    def get(cls) -> dict:
+        """Return the totals of every endpoint.
+
+        Returns:
+            dict: Totals and averages by endpoint.
+        """
+        metrics = {}
+        for endpoint in sorted(db_redis.smembers(cls.ENDPOINTS_KEY)):
+            endpoint = endpoint.decode()
+            data = db_redis.hgetall(cls.KEY.format(endpoint=endpoint))
+            requests = int(data.get(b"requests", 0))
+            queries = int(data.get(b"queries", 0))
+            db_time = float(data.get(b"db_time_ms", 0))
+            metrics[endpoint] = {
+                "requests": requests,
+                "queries": queries,
+                "dbTimeMs": round(db_time, 2),
+                "queriesPerRequest": round(queries / requests, 2) if requests else 0,
+                "dbTimeMsPerRequest": round(db_time / requests, 2) if requests else 0,
+            }
+        return metrics
+
+
+def explain(conn, statement: str, parameters) -> str:
+    """Take the plan of a statement, on the connection that ran it.
+
+    Args:
+        conn (Connection): SQLAlchemy connection.
+        statement (str): SQL statement.
+        parameters: Statement parameters.
+
+    Returns:
+        str: Query plan, one line per row.
+    """
+    prefix = EXPLAIN_PREFIX.get(conn.dialect.name, "EXPLAIN ")
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(value) for value in row) for row in cursor)
+    finally:
+        cursor.close()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    """Take the start time of a statement, kept in its execution context.
+
+    The context is discarded with the statement, also when it fails, so no
+    start time is left behind on the pooled connection.
+    """
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def end_statement(conn, cursor, statement, parameters, context, executemany):
+    """Record a statement in the request profile and log it when slow."""
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    duration = (time.perf_counter() - start) * 1000
+    if not has_request_context() or "sql_profile" not in g:
+        return
+    g.sql_profile.add(statement, duration)
+    threshold = current_app.config.get("SLOW_QUERY_MS", 0)
+    if not threshold or duration < threshold:
+        return
+    plan = ""
+    if not executemany and statement.lstrip().lower().startswith(EXPLAINABLE):
+        try:
+            plan = explain(conn, statement, parameters)
+        except Exception:
+            current_app.logger.exception("Error explaining slow statement")
+    current_app.logger.warning(
+        f"Slow statement ({duration:.2f} ms) in {request.method} {request.path}: "
+        f"{statement}\n{plan}"
+    )
+
+
+def start_profile():
+    """Start the statement profile of a request."""
+    g.sql_profile = RequestProfile(current_app.config.get("SQL_SLOWEST_STATEMENTS", 3))
+
+
+def finish_profile(response: Response) -> Response:
+    """Send the profile of a request in headers and add it to the endpoint totals.
+
+    Args:
+        response (Response): Response instance.
+
+    Returns:
+        Response: Response with the ``Server-Timing`` and ``X-Query-Count`` headers.
+    """
+    profile = g.pop("sql_profile", None)
+    if profile is None:
+        return response
+    response.headers.add("Server-Timing", profile.server_timing())
+    if current_app.config.get("QUERY_COUNT_HEADER", False):
+        response.headers["X-Query-Count"] = str(profile.count)
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    try:
+        SQLMetrics.record(f"{request.method} {rule}", profile)
+    except RedisError:
+        current_app.logger.exception("Error recording SQL metrics")
+    return response
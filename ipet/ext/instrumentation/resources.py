@@ -0,0 +1,131 @@
+"""Instrumentation resource module."""
+from flask_jwt_extended import jwt_required
+from flask_restful import Resource
+
+from ipet.ext.db.pool import pool_status
+from ipet.ext.instrumentation.metrics import latest
+from ipet.ext.instrumentation.profiler import SQLMetrics
+
+
+class PrometheusMetricsResource(Resource):
+    """Resource that exposes the Prometheus metrics."""
+
+    def get(self):
+        """Get the metrics of every worker, in the Prometheus text format.
+
+        ---
+        tags:
+        - Metrics
+        summary: Get the metrics of every worker, in the Prometheus text format
+        responses:
+            200:
+                description: Returns the Prometheus exposition text
+        """
+        return latest()
+
+
+class SQLMetricsResource(Resource):
+    """Resource that reports the SQL totals by endpoint."""
+
+    @jwt_required()
+    def get(self):
+        """Get the SQL statements and database time by endpoint.
+
+        ---
+        tags:
+        - Metrics
+        summary: Get the SQL statements and database time by endpoint
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+        responses:
+            401, 500:
+                description: Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "string"}
+            200:
+                description: Returns the totals of each endpoint
+                schema:
+                    type: object
+                    properties:
+                        data: {"type": "object"}
+        """
+        return {"data": SQLMetrics.get()}
+
+
+class JobStatusResource(Resource):
+    """Resource that reports the scheduled jobs and the workers running them."""
+
+    @jwt_required()
+    def get(self):
+        """Get the last run of each scheduled job and the live workers.
+
+        ---
+        tags:
+        - Metrics
+        summary: Get the last run of each scheduled job and the live workers
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+        responses:
+            401, 500:
+                description: Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "string"}
+            200:
+                description: Returns the jobs and the workers
+                schema:
+                    type: object
+                    properties:
+                        data:
+                            type: object
+                            properties:
+                                jobs: {"type": "object"}
+                                workers: {"type": "object"}
+        """
+        # Imported here: the job modules import the metrics of this package.
+        from ipet.ext.libs.job_lock import JobStatus
+        from ipet.ext.libs.worker import live_workers
+
+        return {"data": {"jobs": JobStatus.all(), "workers": live_workers()}}
+
+
+class PoolMetricsResource(Resource):
+    """Resource that reports the database pool of the process."""
+
+    @jwt_required()
+    def get(self):
+        """Get the pool profile, the connections in use and the checkout waits.
+
+        ---
+        tags:
+        - Metrics
+        summary: Get the pool profile, the connections in use and the checkout waits
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+        responses:
+            401, 500:
+                description: Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "string"}
+            200:
+                description: Returns the pool of the process that answered
+                schema:
+                    type: object
+                    properties:
+                        data: {"type": "object"}
+        """
+        return {"data": pool_status()}
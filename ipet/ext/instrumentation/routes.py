@@ -0,0 +1,25 @@
+"""Module that registers instrumentation routes."""
+from flask import Blueprint
+from flask_restful import Api
+
+from ipet.common.generics.json_backend import output_json
+from ipet.ext.instrumentation.resources import (
+    JobStatusResource,
+    PoolMetricsResource,
+    PrometheusMetricsResource,
+    SQLMetricsResource,
+)
+
+
+def register_routes(bp: Blueprint):
+    """Register packet routes.
+
+    Args:
+        bp (Blueprint): Package blueprint instance.
+    """
+    api = Api(bp)
+    api.representation("application/json")(output_json)
+    api.add_resource(PrometheusMetricsResource, "")
+    api.add_resource(SQLMetricsResource, "/sql")
+    api.add_resource(JobStatusResource, "/jobs")
+    api.add_resource(PoolMetricsResource, "/pool")
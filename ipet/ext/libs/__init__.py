@@ -1,22 +1,33 @@
 """Module that initializes libraries."""
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES
 from flask import Flask
 from flask_apscheduler import APScheduler
 from flask_cors import CORS
 from flask_marshmallow import Marshmallow
 
+from ipet.common.generics import json_backend
+from ipet.ext.libs.job_lock import count_overlapping_runs
+from ipet.ext.libs.ssh import ssh_pool
+
 ma = Marshmallow()
 cors = CORS(resources={"/*": {"origins": "*"}})
 scheduler = APScheduler()
+scheduler.add_listener(count_overlapping_runs, EVENT_JOB_MAX_INSTANCES)
 
 
 def init_app(app: Flask):
     """Initialize component instances.
 
+    The scheduler only starts here when ``SCHEDULER_AUTOSTART`` is set; the
+    jobs normally run in the process started by ``flask run-worker``.
+
     Args:
         app (Flask): Aplication instance.
     """
     ma.init_app(app)
     cors.init_app(app)
-    if not app.config["TESTING"]:
-        scheduler.init_app(app)
+    json_backend.init_app(app)
+    ssh_pool.keepalive = app.config.get("SSH_KEEPALIVE", 30)
+    scheduler.init_app(app)
+    if app.config.get("SCHEDULER_AUTOSTART", True) and not app.config["TESTING"]:
         scheduler.start()
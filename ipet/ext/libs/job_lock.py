@@ -0,0 +1,229 @@
+"""Module that keeps scheduled jobs from running in more than one process at a time."""
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from uuid import uuid4
+
+from flask_apscheduler import APScheduler
+
+from ipet.ext.db import db_redis
+from ipet.ext.instrumentation.metrics import JOB_DURATION
+
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class JobLock:
+    """Distributed lock kept in Redis, with a lease renewed by a heartbeat thread."""
+
+    KEY = "job_lock:{job_id}"
+
+    def __init__(self, job_id: str, lease: int = 60, logger=None) -> None:
+        """Initialize the lock of a job.
+
+        Args:
+            job_id (str): Job identifier.
+            lease (int, optional): Seconds the lock survives without heartbeat. Defaults to 60.
+            logger (Logger, optional): Logger instance. Defaults to None.
+        """
+        self.key = self.KEY.format(job_id=job_id)
+        self.lease_ms = int(lease * 1000)
+        self.token = uuid4().hex
+        self.logger = logger
+        self.lost = False
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def acquire(self) -> bool:
+        """Try to take the lock, without waiting.
+
+        Returns:
+            bool: Whether the lock was taken.
+        """
+        if not db_redis.set(self.key, self.token, nx=True, px=self.lease_ms):
+            return False
+        self._heartbeat = threading.Thread(target=self._renew, daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def release(self):
+        """Stop the heartbeat and free the lock, if it is still ours."""
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+        db_redis.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+
+    def _renew(self):
+        """Extend the lease every third of its duration, until released."""
+        while not self._stop.wait(self.lease_ms / 3000):
+            try:
+                renewed = db_redis.eval(
+                    RENEW_SCRIPT, 1, self.key, self.token, self.lease_ms
+                )
+            except Exception:
+                renewed = 0
+            if not renewed:
+                self.lost = True
+                if self.logger:
+                    self.logger.error(f"Lease lost: {self.key}")
+                return
+
+
+class JobMetrics:
+    """Run counters of the scheduled jobs, shared by every process through Redis."""
+
+    KEY = "job_metrics:{job_id}"
+
+    @classmethod
+    def incr(cls, job_id: str, counter: str):
+        """Increment a job counter.
+
+        Args:
+            job_id (str): Job identifier.
+            counter (str): Counter name (runs, skipped, overlapping or lost).
+        """
+        db_redis.hincrby(cls.KEY.format(job_id=job_id), counter, 1)
+
+    @classmethod
+    def get(cls, job_id: str) -> dict:
+        """Return the counters of a job.
+
+        Args:
+            job_id (str): Job identifier.
+
+        Returns:
+            dict: Counter values by name.
+        """
+        data = db_redis.hgetall(cls.KEY.format(job_id=job_id))
+        return {key.decode(): int(value) for key, value in data.items()}
+
+
+class JobStatus:
+    """State of the last run of each scheduled job, shared through Redis."""
+
+    KEY = "job_status:{job_id}"
+    INDEX = "job_status:ids"
+
+    @classmethod
+    def update(cls, job_id: str, **fields):
+        """Store fields of the last run of a job.
+
+        Args:
+            job_id (str): Job identifier.
+            fields: Values by field name.
+        """
+        db_redis.hset(cls.KEY.format(job_id=job_id), mapping=fields)
+        db_redis.sadd(cls.INDEX, job_id)
+
+    @classmethod
+    def get(cls, job_id: str) -> dict:
+        """Return the last run of a job, with its counters.
+
+        Args:
+            job_id (str): Job identifier.
+
+        Returns:
+            dict: Run fields, empty when the job never ran.
+        """
+        data = db_redis.hgetall(cls.KEY.format(job_id=job_id))
+        status = {key.decode(): value.decode() for key, value in data.items()}
+        if status:
+            status["counters"] = JobMetrics.get(job_id)
+        return status
+
+    @classmethod
+    def all(cls) -> dict:
+        """Return the last run of every job.
+
+        Returns:
+            dict: Run fields by job identifier.
+        """
+        job_ids = sorted(job_id.decode() for job_id in db_redis.smembers(cls.INDEX))
+        return {job_id: cls.get(job_id) for job_id in job_ids}
+
+
+def process_name() -> str:
+    """Return the name that identifies this process to the other ones."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def exclusive_job(scheduler: APScheduler, job_id: str):
+    """Make a job skip its run while another process holds its lock.
+
+    The lock lease, in seconds, comes from the ``JOB_LOCK_LEASE`` setting. The
+    duration of the runs is observed in the Prometheus metrics and the state of
+    the last run is kept in ``JobStatus``. Errors are logged and recorded
+    there instead of reaching the scheduler.
+
+    Args:
+        scheduler (APScheduler): APScheduler instance.
+        job_id (str): Job identifier.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            logger = scheduler.app.logger
+            lease = scheduler.app.config.get("JOB_LOCK_LEASE", 60)
+            lock = JobLock(job_id, lease, logger)
+            if not lock.acquire():
+                JobMetrics.incr(job_id, "skipped")
+                logger.info(f"Job {job_id} is running in another process, skipped")
+                return None
+            JobMetrics.incr(job_id, "runs")
+            JobStatus.update(
+                job_id,
+                state="running",
+                worker=process_name(),
+                started_at=datetime.utcnow().isoformat(),
+                finished_at="",
+                error="",
+            )
+            start = time.perf_counter()
+            state, error = "failed", ""
+            try:
+                with JOB_DURATION.labels(job_id).time():
+                    result = func(*args, **kwargs)
+                state = "succeeded"
+                return result
+            except Exception as exc:
+                error = repr(exc)
+                logger.exception(f"Job {job_id} failed")
+                return None
+            finally:
+                JobStatus.update(
+                    job_id,
+                    state=state,
+                    error=error,
+                    finished_at=datetime.utcnow().isoformat(),
+                    duration_ms=round((time.perf_counter() - start) * 1000, 3),
+                )
+                if lock.lost:
+                    JobMetrics.incr(job_id, "lost")
+                lock.release()
+
+        return wrapper
+
+    return decorator
+
+
+def count_overlapping_runs(event):
+    """Count ticks dropped because the previous run of the job was still going.
+
+    Args:
+        event (JobSubmissionEvent): APScheduler event.
+    """
+    JobMetrics.incr(event.job_id, "overlapping")
@@ -19,6 +19,17 @@ class PaginateQueryParamsSchema(ma.Schema):
         validate=validate.Range(min=1, max=50),
         required=False,
     )
+    cursor = ma.String(
+        missing=None,
+        description="Keyset paging cursor, returned as nextCursor. Send it empty for the first page.",
+        required=False,
+    )
+    with_count = ma.Boolean(
+        missing=False,
+        data_key="withCount",
+        description="Count the total of items when paging by cursor.",
+        required=False,
+    )
 
 
 class ResponsePaginateSchema(ma.Schema):
@@ -27,9 +38,33 @@ class ResponsePaginateSchema(ma.Schema):
     current_page = ma.Integer(data_key="currentPage")
     total_pages = ma.Integer(data_key="totalPages")
     total_items = ma.Integer(data_key="totalItems")
+    next_cursor = ma.String(data_key="nextCursor")
+    count_strategy = ma.String(data_key="countStrategy")
 
 
 class DetailUrlParamSchema(ma.Schema):
     """Data schema for URL params by identificator."""
 
     id = ma.Integer(required=True, description="Identifier Number")
+
+
+class BatchQuerySchema(ma.Schema):
+    """Data schema for query params of batch writes."""
+
+    mode = ma.String(
+        missing="atomic",
+        description="atomic: save every element or none; best-effort: save the valid ones.",
+        validate=validate.OneOf(("atomic", "best-effort")),
+        required=False,
+    )
+
+
+class ExportQueryParamsSchema(ma.Schema):
+    """Data schema for query parameters of streaming exports."""
+
+    format = ma.String(
+        missing="ndjson",
+        description="Export format, ndjson or csv. Sent gzipped when accepted by the client.",
+        validate=validate.OneOf(("ndjson", "csv")),
+        required=False,
+    )
@@ -1,8 +1,31 @@
-"""Module responsible for ssh connections."""
-from paramiko import AutoAddPolicy, SSHClient
+"""Module responsible for ssh connections.
 
+paramiko is imported on first use, so processes that never open a
+connection do not pay for it.
+"""
+import atexit
+import gzip
+import io
+import threading
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING
 
-def create_ssh_client(server: str, port: int, user: str, password: str) -> SSHClient:
+if TYPE_CHECKING:
+    from paramiko import SSHClient
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def connection_errors() -> tuple:
+    """Return the exceptions raised by a broken connection."""
+    from paramiko import SSHException
+
+    return (SSHException, OSError, EOFError)
+
+
+def create_ssh_client(server: str, port: int, user: str, password: str) -> "SSHClient":
     """Create connection to ssh server.
 
     Args:
@@ -14,8 +37,271 @@ def create_ssh_client(server: str, port: int, user: str, password: str) -> SSHCl
     Returns:
         SSHClient: returns connected ssh client.
     """
+    from paramiko import AutoAddPolicy, SSHClient
+
     ssh = SSHClient()
     ssh.load_system_host_keys()
     ssh.set_missing_host_key_policy(AutoAddPolicy())
     ssh.connect(server, port, user, password)
     return ssh
+
+
+class SSHConnectionPool:
+    """Keep one authenticated SSH connection per server and user for the process.
+
+    Each caller opens its own channel (an SFTP session, for instance) on the
+    shared transport, so the key exchange and authentication happen once.
+    """
+
+    def __init__(self, keepalive: int = 30) -> None:
+        """Initialize the pool.
+
+        Args:
+            keepalive (int, optional): Seconds between keepalive packets. Defaults to 30.
+        """
+        self.keepalive = keepalive
+        self.logger = getLogger(__name__)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_healthy(client: "SSHClient") -> bool:
+        """Check whether a connection can still open channels.
+
+        Args:
+            client (SSHClient): Pooled client.
+
+        Returns:
+            bool: Whether the transport is active and authenticated.
+        """
+        transport = client.get_transport() if client else None
+        if not (transport and transport.is_active() and transport.is_authenticated()):
+            return False
+        try:
+            transport.send_ignore()
+        except connection_errors():
+            return False
+        return True
+
+    def get(self, server: str, port: int, user: str, password: str) -> "SSHClient":
+        """Return a healthy connection, reconnecting when needed.
+
+        Args:
+            server (str): Server host.
+            port (int): Server port.
+            user (str): Server user.
+            password (str): Server password.
+
+        Returns:
+            SSHClient: Connected ssh client, shared with other callers.
+        """
+        key = (server, port, user)
+        with self._lock:
+            client = self._clients.get(key)
+            if self.is_healthy(client):
+                return client
+            if client:
+                self.logger.warning(f"SSH connection to {server} lost, reconnecting")
+                client.close()
+            client = create_ssh_client(server, port, user, password)
+            client.get_transport().set_keepalive(self.keepalive)
+            self._clients[key] = client
+            return client
+
+    def discard(self, server: str, port: int, user: str):
+        """Close and forget a connection.
+
+        Args:
+            server (str): Server host.
+            port (int): Server port.
+            user (str): Server user.
+        """
+        with self._lock:
+            client = self._clients.pop((server, port, user), None)
+        if client:
+            client.close()
+
+    @contextmanager
+    def sftp(self, server: str, port: int, user: str, password: str):
+        """Open an SFTP session on a pooled connection.
+
+        The connection is replaced once if the session can not be opened.
+
+        Args:
+            server (str): Server host.
+            port (int): Server port.
+            user (str): Server user.
+            password (str): Server password.
+
+        Yields:
+            SFTPClient: SFTP session, closed on exit.
+        """
+        try:
+            sftp = self.get(server, port, user, password).open_sftp()
+        except connection_errors():
+            self.discard(server, port, user)
+            sftp = self.get(server, port, user, password).open_sftp()
+        try:
+            yield sftp
+        finally:
+            sftp.close()
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+
+ssh_pool = SSHConnectionPool()
+atexit.register(ssh_pool.close)
+
+
+class RemoteStream(io.RawIOBase):
+    """Sequential, read-only view of a remote SFTP file.
+
+    Reads ahead a bounded window of pipelined requests, so memory does not grow
+    with the file size and nothing is written to local disk.
+    """
+
+    def __init__(
+        self,
+        remote,
+        size: int,
+        start: int = 0,
+        chunk_size: int = 32768,
+        chunks: int = 8,
+    ) -> None:
+        """Initialize the stream.
+
+        Args:
+            remote (SFTPFile): Remote file opened in binary mode.
+            size (int): Remote file size.
+            start (int, optional): Offset of the first byte. Defaults to 0.
+            chunk_size (int, optional): Bytes per read request. Defaults to 32768.
+            chunks (int, optional): Read requests in flight. Defaults to 8.
+        """
+        super().__init__()
+        self.remote = remote
+        self.size = size
+        self.position = start
+        self.chunk_size = chunk_size
+        self.chunks = chunks
+        self._window = iter(())
+        self._block = b""
+
+    def readable(self) -> bool:
+        """Inform that the stream is readable."""
+        return True
+
+    def _next_block(self) -> bytes:
+        """Return the next block, requesting a new window when needed."""
+        block = next(self._window, None)
+        if block is None:
+            end = min(self.position + self.chunk_size * self.chunks, self.size)
+            requests = [
+                (offset, min(self.chunk_size, end - offset))
+                for offset in range(self.position, end, self.chunk_size)
+            ]
+            if not requests:
+                return b""
+            self._window = iter(self.remote.readv(requests))
+            block = next(self._window)
+        self.position += len(block)
+        return block
+
+    def readinto(self, buffer) -> int:
+        """Fill a buffer with the next bytes of the remote file.
+
+        Args:
+            buffer: Writable buffer.
+
+        Returns:
+            int: Number of bytes read, 0 at the end of the file.
+        """
+        if not self._block:
+            self._block = self._next_block()
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        return size
+
+
+def detect_compression(path: str, compression: str = "auto"):
+    """Work out the compression of a remote file.
+
+    Args:
+        path (str): Remote file path.
+        compression (str, optional): "gzip", "zstd", "none" or "auto", which
+        looks at the file extension. Defaults to "auto".
+
+    Returns:
+        Compression name, or None for plain files.
+    """
+    if compression == "auto":
+        return COMPRESSION_SUFFIXES.get(PurePosixPath(path).suffix)
+    return None if compression == "none" else compression
+
+
+def decompress(stream, compression: str = None):
+    """Wrap a binary stream with a streaming decompressor.
+
+    Args:
+        stream: Binary stream.
+        compression (str, optional): "gzip", "zstd" or None. Defaults to None.
+
+    Raises:
+        RuntimeError: The zstandard package is not installed.
+
+    Returns:
+        Binary stream with the decompressed bytes.
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Install the zstandard package to read .zst files")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+    return stream
+
+
+class RemoteLineReader:
+    """Iterate the lines of a remote file while it is downloaded."""
+
+    def __init__(
+        self,
+        remote,
+        size: int,
+        start: int = 0,
+        compression: str = None,
+        complete: bool = False,
+    ) -> None:
+        """Initialize the reader.
+
+        Args:
+            remote (SFTPFile): Remote file opened in binary mode.
+            size (int): Remote file size.
+            start (int, optional): Offset of the first byte. Defaults to 0.
+            compression (str, optional): "gzip", "zstd" or None. Defaults to None.
+            complete (bool, optional): The file is no longer being written. Defaults to False.
+        """
+        self.offset = start
+        self.compression = compression
+        self.complete = complete
+        stream = io.BufferedReader(RemoteStream(remote, size, start))
+        self._stream = decompress(stream, compression)
+
+    def __iter__(self):
+        """Yield decoded lines and advance ``offset`` past each one.
+
+        On plain files that are not ``complete``, a last line without line
+        break may still be being written, so it is left for the next run.
+        """
+        for line in self._stream:
+            if not line.endswith(b"\n") and not (self.compression or self.complete):
+                return
+            self.offset += len(line)
+            yield line.decode()
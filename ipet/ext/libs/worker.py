@@ -0,0 +1,98 @@
+"""Module that runs the scheduled jobs in a process of their own.
+
+Web processes leave the scheduler stopped (``SCHEDULER_AUTOSTART = false``),
+so ingestion never competes with request handling for the GIL or the
+database pool. ``flask run-worker`` starts this worker instead.
+"""
+import json
+import signal
+import threading
+from datetime import datetime
+
+from flask import Flask
+from flask_apscheduler import APScheduler
+
+from ipet.ext.db import db_redis
+from ipet.ext.db.pool import configure_pool
+from ipet.ext.libs.job_lock import process_name
+
+WORKER_KEY = "worker:{name}"
+
+
+def live_workers() -> dict:
+    """Return the workers whose heartbeat has not expired.
+
+    Returns:
+        dict: Worker details by process name.
+    """
+    workers = {}
+    for key in db_redis.scan_iter(WORKER_KEY.format(name="*")):
+        body = db_redis.get(key)
+        if body is not None:
+            workers[key.decode().split(":", 1)[1]] = json.loads(body)
+    return workers
+
+
+class Worker:
+    """Process that runs only the scheduler and its job executors."""
+
+    def __init__(self, app: Flask, scheduler: APScheduler) -> None:
+        """Initialize the worker.
+
+        Args:
+            app (Flask): Aplication instance.
+            scheduler (APScheduler): APScheduler instance, with the jobs registered.
+        """
+        self.app = app
+        self.scheduler = scheduler
+        self.heartbeat = app.config.get("WORKER_HEARTBEAT", 10)
+        self.name = process_name()
+        self.started_at = datetime.utcnow().isoformat()
+        self._stop = threading.Event()
+
+    @property
+    def key(self) -> str:
+        """Return the Redis key of the worker heartbeat."""
+        return WORKER_KEY.format(name=self.name)
+
+    def beat(self):
+        """Announce that the worker is alive, with the jobs it runs."""
+        body = {
+            "started_at": self.started_at,
+            "jobs": sorted(job.id for job in self.scheduler.get_jobs()),
+        }
+        db_redis.set(self.key, json.dumps(body), ex=self.heartbeat * 3)
+
+    def stop(self, signum=None, frame=None):
+        """Ask the worker to stop after the running jobs finish."""
+        self._stop.set()
+
+    def run(self):
+        """Start the scheduler and block until SIGTERM or SIGINT.
+
+        The database pool takes the ``worker`` profile. On shutdown no new job
+        is started and the running ones are waited for, so their locks and
+        checkpoints are left consistent.
+        """
+        logger = self.app.logger
+        configure_pool(self.app, "worker")
+        handlers = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        # The base scheduler is started directly: the Flask wrapper refuses to
+        # start in debug mode outside the reloader, which the worker never uses.
+        self.scheduler.scheduler.start()
+        logger.info(f"Worker {self.name} started")
+        try:
+            while True:
+                self.beat()
+                if self._stop.wait(self.heartbeat):
+                    break
+        finally:
+            logger.info(f"Worker {self.name} stopping, waiting for running jobs")
+            self.scheduler.shutdown(wait=True)
+            db_redis.delete(self.key)
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+            logger.info(f"Worker {self.name} stopped")
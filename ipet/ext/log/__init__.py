@@ -0,0 +1,67 @@
+"""Logging package initialization module.
+
+Records are put in a bounded queue by the calling thread and written by a
+background listener, so logging never waits on disk I/O.
+"""
+import atexit
+import logging
+from logging.handlers import QueueListener, RotatingFileHandler
+from queue import Queue
+
+from flask import Flask
+
+from ipet.ext.log.handlers import DroppingQueueHandler, JSONFormatter, RateLimitFilter
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(funcName)s - - [%(asctime)s] %(message)s"
+
+listener = None
+queue_handler = None
+
+
+def stop_listener():
+    """Write the queued records, stop the background writer and remove its handler."""
+    global listener, queue_handler
+    if listener is not None:
+        logging.getLogger().removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        listener = queue_handler = None
+
+
+def init_app(app: Flask):
+    """Send the root logger records to a queue written in the background.
+
+    Args:
+        app (Flask): Aplication instance.
+    """
+    global listener, queue_handler
+    stop_listener()
+    file_handler = RotatingFileHandler(
+        app.config.get("LOG_FILE", "record.log"),
+        maxBytes=app.config.get("LOG_MAX_BYTES", 10 * 1024 * 1024),
+        backupCount=app.config.get("LOG_BACKUP_COUNT", 5),
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(
+        JSONFormatter()
+        if app.config.get("LOG_FORMAT", "text") == "json"
+        else logging.Formatter(TEXT_FORMAT)
+    )
+    queue = Queue(app.config.get("LOG_QUEUE_SIZE", 10000))
+    queue_handler = DroppingQueueHandler(queue)
+    queue_handler.addFilter(
+        RateLimitFilter(
+            app.config.get("LOG_RATE_LIMIT", 100),
+            app.config.get("LOG_RATE_WINDOW", 60),
+            app.config.get("LOG_SAMPLE_RATE", 100),
+        )
+    )
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+    listener = QueueListener(queue, file_handler, respect_handler_level=True)
+    listener.start()
+
+
+atexit.register(stop_listener)
@@ -0,0 +1,118 @@
+"""Module with the handlers, filters and formatters of the logging pipeline."""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize a record.
+
+        Args:
+            record (LogRecord): Log record.
+
+        Returns:
+            str: JSON line.
+        """
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """Let through a limited number of similar records per time window.
+
+    Records are similar when they come from the same logging call: logger,
+    level, file and line, so messages embedding their data still share a
+    window. Beyond ``limit`` records in a window, only one in ``sample``
+    passes; the number of records dropped is appended to the first similar
+    record of the next window. At most ``maxsize`` windows are kept, the least
+    recently used ones being discarded.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        window: float = 60,
+        sample: int = 0,
+        maxsize: int = 10000,
+    ) -> None:
+        """Initialize the filter.
+
+        Args:
+            limit (int, optional): Records per key and window. Defaults to 100.
+            window (float, optional): Window length, in seconds. Defaults to 60.
+            sample (int, optional): Pass one in ``sample`` records over the limit, 0 for none. Defaults to 0.
+            maxsize (int, optional): Maximum number of windows kept. Defaults to 10000.
+        """
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.sample = sample
+        self.maxsize = maxsize
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether a record is logged.
+
+        Args:
+            record (LogRecord): Log record.
+
+        Returns:
+            bool: Whether the record passes.
+        """
+        if not self.limit:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            started, seen = self._windows.get(key, (now, 0))
+            if now - started >= self.window:
+                dropped = seen - self.limit
+                if dropped > 0:
+                    record.msg = f"{record.msg} ({dropped} similar messages suppressed)"
+                started, seen = now, 0
+            seen += 1
+            self._windows[key] = (started, seen)
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.maxsize:
+                self._windows.popitem(last=False)
+        over = seen - self.limit
+        return over <= 0 or bool(self.sample and over % self.sample == 0)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records, instead of blocking, when the queue is full."""
+
+    def __init__(self, queue) -> None:
+        """Initialize the handler.
+
+        Args:
+            queue (Queue): Queue read by the listener.
+        """
+        super().__init__(queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        """Put a record in the queue, counting it when it does not fit.
+
+        Args:
+            record (LogRecord): Log record.
+        """
+        try:
+            self.queue.put_nowait(record)
+        except Exception:
+            self.dropped += 1
@@ -7,6 +7,16 @@ class Product(db.Model, ManagementMixin):
     """Product data model."""
 
     __tablename__ = "product"
+    __searchable__ = ("full_name", "brand")
+    __unique_fields__ = (("full_name", "full_description"),)
+    __unique_message__ = {
+        "_schema": ["There is a product with that name and description"]
+    }
+    __table_args__ = (
+        db.UniqueConstraint(
+            "full_name", "full_description", name="uq_product_full_name_description"
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(), nullable=False)
@@ -2,11 +2,17 @@
 from flask_jwt_extended import jwt_required
 from flask_restful import Resource
 
-from ipet.common.generics.resource import CRUDListResource, CRUDResource
+from ipet.common.generics.resource import (
+    BatchResource,
+    CRUDListResource,
+    CRUDResource,
+    ExportResource,
+)
 from ipet.ext.product.models import Product
 from ipet.ext.product.schemas import (
     ProductListSchema,
     ProductSchema,
+    ProductsExportQuerySchema,
     ProductsQuerySchema,
 )
 
@@ -216,3 +222,139 @@ class ProductResource(Resource, CRUDResource):
                         "message": {"type": "string"}
         """
         return super().delete(id)
+
+
+class ProductBatchResource(Resource, BatchResource):
+    """Resource corresponding to batches of Product elements."""
+
+    def __init__(self) -> None:
+        """Initialize properties needed by generic CRUD functions."""
+        super().__init__()
+        self.ClassModel = Product
+        self.ClassSchema = ProductSchema
+
+    @jwt_required()
+    def post(self):
+        """Create many products.
+
+        ---
+        tags:
+        - Product
+        summary: Create many products, sent as a JSON array or NDJSON
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+          - in: query
+            schema: BatchQuerySchema
+        requestBody:
+            content:
+                application/json:
+                    schema:
+                        type: array
+                        items: ProductSchema
+                application/x-ndjson:
+                    schema: ProductSchema
+        responses:
+            400, 401, 500:
+                description: Bad Request, Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "object"}
+            201, 207:
+                description: All products created, some products rejected
+                schema:
+                    type: object
+                    properties:
+                        data: {"type": "array", "items": {"type": "object"}}
+        """
+        return super().post()
+
+    @jwt_required()
+    def patch(self):
+        """Partial update many products.
+
+        ---
+        tags:
+        - Product
+        summary: Partially update many products, identified by id
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+          - in: query
+            schema: BatchQuerySchema
+        requestBody:
+            content:
+                application/json:
+                    schema:
+                        type: array
+                        items: ProductSchema
+                application/x-ndjson:
+                    schema: ProductSchema
+        responses:
+            400, 401, 500:
+                description: Bad Request, Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "object"}
+            200, 207:
+                description: All products updated, some products rejected
+                schema:
+                    type: object
+                    properties:
+                        data: {"type": "array", "items": {"type": "object"}}
+        """
+        return super().patch()
+
+
+class ProductExportResource(Resource, ExportResource):
+    """Resource that streams every product."""
+
+    def __init__(self) -> None:
+        """Initialize properties needed by generic CRUD functions."""
+        super().__init__()
+        self.ClassModel = Product
+        self.ClassSchema = ProductSchema
+        self.QuerySchema = ProductsExportQuerySchema
+        self.filter = {
+            "full_name": self.ClassModel.full_name,
+            "brand": self.ClassModel.brand,
+        }
+        self.order_by = self.ClassModel.id
+
+    @jwt_required()
+    def get(self):
+        """Export every product.
+
+        ---
+        tags:
+        - Product
+        summary: Export every product, as NDJSON or CSV
+        security:
+          - jwt: []
+        parameters:
+          - in: header
+            schema: AuthorizationSchema
+          - in: query
+            schema: ProductsExportQuerySchema
+        responses:
+            400, 401, 500:
+                description: Bad Request, Unautorized, Internal Error
+                schema:
+                    type: object
+                    properties:
+                        "message": {"type": "string"}
+            200:
+                description: Returns one ProductSchema object per line
+                content:
+                    application/x-ndjson:
+                        schema: ProductSchema
+                    text/csv:
+                        schema: ProductSchema
+        """
+        return super().get()
@@ -2,7 +2,13 @@
 from flask import Blueprint
 from flask_restful import Api
 
-from ipet.ext.product.resources import ProductListResource, ProductResource
+from ipet.common.generics.json_backend import output_json
+from ipet.ext.product.resources import (
+    ProductBatchResource,
+    ProductExportResource,
+    ProductListResource,
+    ProductResource,
+)
 
 
 def register_routes(bp: Blueprint):
@@ -12,5 +18,8 @@ def register_routes(bp: Blueprint):
         bp (Blueprint): Package blueprint instance.
     """
     api = Api(bp)
+    api.representation("application/json")(output_json)
     api.add_resource(ProductResource, "/<int:id>")
     api.add_resource(ProductListResource, "/")
+    api.add_resource(ProductBatchResource, "/batch")
+    api.add_resource(ProductExportResource, "/export")
@@ -1,8 +1,10 @@
 """Module that implements serialization and validation of data referring to the product's domain."""
-from marshmallow import ValidationError, validates_schema
-
 from ipet.ext.libs import ma
-from ipet.ext.libs.ma_schemas import PaginateQueryParamsSchema, ResponsePaginateSchema
+from ipet.ext.libs.ma_schemas import (
+    ExportQueryParamsSchema,
+    PaginateQueryParamsSchema,
+    ResponsePaginateSchema,
+)
 from ipet.ext.product.models import Product
 
 
@@ -21,18 +23,6 @@ class ProductSchema(ma.SQLAlchemySchema):
     created_at = ma.auto_field(dump_only=True, data_key="createdAt")
     brand = ma.auto_field()
 
-    @validates_schema
-    def validate_names(self, data, **kwargs):
-        """Ensure that there is no duplication of full_name and full_description simultaneously."""
-        if (
-            self.context.get("custom_validate")
-            and Product.query.filter(
-                Product.full_name == data["full_name"],
-                Product.full_description == data["full_description"],
-            ).first()
-        ):
-            raise ValidationError("There is a product with that name and description")
-
 
 class ProductListSchema(ResponsePaginateSchema):
     """Data schema for product list."""
@@ -40,8 +30,16 @@ class ProductListSchema(ResponsePaginateSchema):
     elements = ma.List(ma.Nested(ProductSchema))
 
 
-class ProductsQuerySchema(PaginateQueryParamsSchema):
-    """Data schema for query params, used in product queries that require pagination."""
+class ProductsFilterSchema(ma.Schema):
+    """Data schema for query params, used as product filters."""
 
     full_name = ma.String(missing=None, description="Full product name")
     brand = ma.String(missing=None, description="Product brand")
+
+
+class ProductsQuerySchema(PaginateQueryParamsSchema, ProductsFilterSchema):
+    """Data schema for query params, used in product queries that require pagination."""
+
+
+class ProductsExportQuerySchema(ExportQueryParamsSchema, ProductsFilterSchema):
+    """Data schema for query params, used in product exports."""
@@ -3,13 +3,14 @@ from pytest import fixture
 
 from ipet import create_app
 from ipet.ext.cli.views import populate_db
-from ipet.ext.db import db
+from ipet.ext.db import db, db_redis
 
 
 @fixture
 def app():
     app = create_app()
     with app.app_context():
+        db_redis.flushdb()
         db.create_all()
         populate_db()
         yield app
@@ -1,6 +1,19 @@
-from http.client import FOUND
+import gzip
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from http.client import FOUND, NOT_MODIFIED
+from json import loads
+from uuid import UUID
 
+from flask import Flask
 from flask.testing import FlaskClient
+from pytest import mark
+
+from ipet import create_app
+from ipet.common.generics.json_backend import load_backend
 
 
 def test_app_is_created(app):
@@ -13,3 +26,95 @@ def test_root_should_return_status_code_302(client: FlaskClient):
 
 def test_configuration_must_is_enabled(config):
     assert config["TESTING"] == True
+
+
+def test_openapi_spec_cached_and_compressed(client: FlaskClient):
+    response = client.get("/swagger/ui.json", headers={"Accept-Encoding": "gzip"})
+    assert response.content_encoding == "gzip"
+    assert "/product/batch" in loads(gzip.decompress(response.data))["paths"]
+    assert response.cache_control.max_age == 86400
+    cached = client.get(
+        "/swagger/ui.json",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]},
+    )
+    assert cached.status_code == NOT_MODIFIED
+
+
+def test_openapi_spec_file(app: Flask, client: FlaskClient, tmp_path):
+    path = tmp_path / "openapi.json"
+    app.test_cli_runner().invoke(args=["build-spec", str(path)])
+    app.config["OPENAPI_SPEC_FILE"] = str(path)
+    app.extensions.pop("openapi_spec", None)
+    assert client.get("/swagger/ui.json").data == path.read_bytes()
+
+
+def test_process_role_skips_extensions(monkeypatch):
+    monkeypatch.setenv("FLASK_PROCESS_ROLE", "worker")
+    app = create_app()
+    skipped = [
+        entry["extension"]
+        for entry in app.extensions["startup_profile"]
+        if not entry["loaded"]
+    ]
+    assert skipped == [
+        "ipet.ext.auth:init_app",
+        "ipet.ext.product:init_app",
+        "ipet.ext.doc:init_app",
+    ]
+    assert "doc" not in app.blueprints and "customer" in app.blueprints
+
+
+def test_heavy_modules_are_not_imported_on_startup():
+    code = (
+        "import sys; from ipet import create_app; create_app(); "
+        "print(sorted({'paramiko', 'apispec'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+@mark.parametrize("name", ["orjson", "json"])
+def test_json_backends_encode_extra_types(name):
+    backend = load_backend(name)
+    value = {
+        "when": datetime(2022, 8, 1, 10, 30),
+        "price": Decimal("90.10"),
+        "id": UUID(int=1),
+        "point": Point(1, 2),
+        1: "Macarrão",
+    }
+    assert loads(backend.dumps(value)) == {
+        "when": "2022-08-01T10:30:00",
+        "price": "90.10",
+        "id": "00000000-0000-0000-0000-000000000001",
+        "point": {"x": 1, "y": 2},
+        "1": "Macarrão",
+    }
+    assert backend.loads(backend.dumps([1, "a"])) == [1, "a"]
+
+
+def test_large_lists_are_streamed(app: Flask, authentication, client: FlaskClient):
+    whole = client.get("/product/", headers=authentication)
+    app.config["JSON_STREAM_THRESHOLD"] = 1
+    streamed = client.get("/product/", headers=authentication)
+    assert "Content-Length" in whole.headers
+    assert "Content-Length" not in streamed.headers
+    assert streamed.json == whole.json
+
+
+def test_invalid_json_body(authentication, client: FlaskClient):
+    response = client.post(
+        "/product/",
+        headers=authentication,
+        data="{invalid",
+        content_type="application/json",
+    )
+    assert response.status_code == 400
@@ -1,8 +1,16 @@
 from http.client import BAD_REQUEST, CREATED, OK, UNAUTHORIZED
+from threading import Event, Thread
+from time import sleep
 
 from flask.testing import FlaskClient
+from pytest import raises
+from werkzeug.exceptions import TooManyRequests
+from werkzeug.security import check_password_hash, generate_password_hash
 
+from ipet.ext.auth.cache import RevocationCache, TTLCache, revocation_cache
+from ipet.ext.auth.hashing import PasswordHasher, password_hasher
 from ipet.ext.auth.models import User
+from ipet.ext.db import db_redis
 
 
 def test_post_without_body_in_create_user_resouce(client: FlaskClient):
@@ -17,6 +25,25 @@ def test_user_creation(create_user_response):
     assert User.query.filter(User.username == "testing").first() is not None
 
 
+def test_duplicated_user_creation(client: FlaskClient):
+    response = client.post(
+        "/auth", json={"username": "admin", "password": "x"}, follow_redirects=True
+    )
+    assert response.status_code == BAD_REQUEST
+    assert response.get_json()["message"] == {"username": ["Username already exists"]}
+
+
+def test_duplicated_user_is_not_hashed(client: FlaskClient, monkeypatch):
+    def generate(password):
+        raise AssertionError("password hashed")
+
+    monkeypatch.setattr(password_hasher, "generate", generate)
+    response = client.post(
+        "/auth", json={"username": "admin", "password": "x"}, follow_redirects=True
+    )
+    assert response.status_code == BAD_REQUEST
+
+
 def test_return_code_for_user_authentication(authenticate_response):
     authenticate_response.status_code == OK
 
@@ -59,3 +86,65 @@ def test_token_invalidation(authentication, client: FlaskClient):
         ).status_code
         == UNAUTHORIZED
     )
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_ttl_cache_expiration():
+    cache = TTLCache(ttl=30)
+    cache.set("a", 1, ttl=0.01)
+    sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_revocation_published_by_another_process(app):
+    assert not revocation_cache.is_revoked("testing-jti")
+    db_redis.set("testing-jti", "")
+    db_redis.publish(RevocationCache.CHANNEL, "testing-jti")
+    for _ in range(30):
+        if revocation_cache.revoked.get("testing-jti"):
+            break
+        sleep(0.1)
+    assert revocation_cache.is_revoked("testing-jti")
+
+
+def test_password_rehashed_on_login(app, client: FlaskClient):
+    user = User.query.filter_by(username="admin").first()
+    user.password = generate_password_hash("admin", "pbkdf2:sha256:500")
+    user.save()
+    assert password_hasher.needs_rehash(user.password)
+    response = client.post(
+        "/auth/token", json={"username": "admin", "password": "admin"}
+    )
+    assert response.status_code == OK
+    user = User.query.filter_by(username="admin").first()
+    assert not password_hasher.needs_rehash(user.password)
+    assert check_password_hash(user.password, "admin")
+
+
+def test_password_hasher_rejects_when_saturated(app):
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    started, release = Event(), Event()
+
+    def slow_check(*args):
+        started.set()
+        release.wait(5)
+        return True
+
+    thread = Thread(target=hasher._run, args=("check", slow_check))
+    thread.start()
+    started.wait(5)
+    try:
+        with raises(TooManyRequests):
+            hasher.check("hash", "password")
+    finally:
+        release.set()
+        thread.join()
+    assert hasher._run("check", lambda: True)
@@ -1,10 +1,31 @@
+import gzip
 from http.client import BAD_REQUEST, CREATED, OK, UNAUTHORIZED
+from io import BytesIO
+from json import dumps
+from types import SimpleNamespace
 
 from flask.testing import FlaskClient
+from marshmallow import Schema, fields, post_dump
 from pytest import mark
-
+from redis.exceptions import RedisError
+from sqlalchemy.exc import OperationalError
+
+from ipet.common.generics.compiler import compiled
+from ipet.ext.config import environment_var
+from ipet.ext.customer import ingestion
+from ipet.ext.customer.checkpoint import OfflineCheckpoint
+from ipet.ext.customer.ingestion import ingest_lines
 from ipet.ext.customer.models import AssocProductCustomer, Customer
-from ipet.ext.customer.schemas import STATUS_CHOICE
+from ipet.ext.customer.schemas import (
+    STATUS_CHOICE,
+    CustomerListSchema,
+    CustomerSchema,
+    ProductCustomerSchema,
+)
+from ipet.ext.customer.tasks import sync_offline_base
+from ipet.ext.db.loading import loader_options
+from ipet.ext.product.models import Product
+from ipet.ext.product.schemas import ProductListSchema
 
 
 def test_customer_listing_return_code(authentication, client: FlaskClient):
@@ -302,3 +323,247 @@ def test_authentication_obligation_in_update_customer_product_status(
         ).status_code
         == UNAUTHORIZED
     )
+
+
+def test_offline_base_ingestion_counters(app):
+    lines = [
+        "1|1|20220101120000\n",
+        "2|3|20220101120000\n",
+        "2|3|20220101120000\n",
+        "99|1|20220101120000\n",
+        "invalid line\n",
+    ]
+    report = ingest_lines(lines, app.logger, chunk_size=2)
+    assert (report.accepted, report.duplicate, report.rejected) == (1, 2, 2)
+
+
+def test_offline_base_ingestion(app):
+    ingest_lines(["2|3|20220101120000\n"], app.logger)
+    assert (
+        AssocProductCustomer.query.filter(
+            AssocProductCustomer.customer_id == 2, AssocProductCustomer.product_id == 3
+        ).first()
+        is not None
+    )
+
+
+def test_offline_checkpoint_resume_offset(app):
+    file = BytesIO(b"1|1|20220101120000\n2|3|20220101120000\n")
+    OfflineCheckpoint("testing").save(19, OfflineCheckpoint.window_digest(file, 19), 38)
+    checkpoint = OfflineCheckpoint("testing").load()
+    assert checkpoint.resume_offset(file, len(file.getvalue())) == 19
+    checkpoint.clear()
+
+
+def test_offline_checkpoint_changed_prefix(app):
+    file = BytesIO(b"1|1|20220101120000\n2|3|20220101120000\n")
+    OfflineCheckpoint("testing").save(19, OfflineCheckpoint.window_digest(file, 19), 38)
+    file = BytesIO(b"9|1|20220101120000\n2|3|20220101120000\n")
+    checkpoint = OfflineCheckpoint("testing").load()
+    assert checkpoint.resume_offset(file, len(file.getvalue())) == 0
+    checkpoint.clear()
+
+
+def test_offline_checkpoint_changed_head_with_same_tail(app, monkeypatch):
+    monkeypatch.setattr(OfflineCheckpoint, "WINDOW", 19)
+    lines = b"2|3|20220101120000\n2|4|20220101120000\n2|5|20220101120000\n"
+    file = BytesIO(lines)
+    OfflineCheckpoint("testing").save(57, OfflineCheckpoint.window_digest(file, 57), 57)
+    file = BytesIO(b"9" + lines[1:])
+    checkpoint = OfflineCheckpoint("testing").load()
+    assert checkpoint.resume_offset(file, 57) == 0
+    checkpoint.clear()
+
+
+def test_offline_checkpoint_older_file(app):
+    file = BytesIO(b"1|1|20220101120000\n2|3|20220101120000\n")
+    digest = OfflineCheckpoint.window_digest(file, 19)
+    OfflineCheckpoint("testing").save(19, digest, 38, mtime=1000.0)
+    checkpoint = OfflineCheckpoint("testing").load()
+    assert checkpoint.resume_offset(file, 38, mtime=2000.0) == 19
+    assert checkpoint.resume_offset(file, 38, mtime=500.0) == 0
+    checkpoint.clear()
+
+
+class RemoteFile(BytesIO):
+    mtime = 0.0
+
+    def stat(self):
+        return SimpleNamespace(st_size=len(self.getvalue()), st_mtime=self.mtime)
+
+    def readv(self, chunks):
+        for offset, size in chunks:
+            self.seek(offset)
+            yield self.read(size)
+
+
+def test_sync_offline_base_reads_only_new_lines(app):
+    OfflineCheckpoint("testing").clear()
+    remote = RemoteFile(b"2|3|20220101120000\n2|4|2022")
+    assert sync_offline_base(remote, "testing", app.logger).accepted == 1
+    remote.seek(0, 2)
+    remote.write(b"0101120000\n")
+    report = sync_offline_base(remote, "testing", app.logger)
+    assert (report.accepted, report.duplicate) == (1, 0)
+    assert sync_offline_base(remote, "testing", app.logger) is None
+    OfflineCheckpoint("testing").clear()
+
+
+def test_sync_offline_base_imports_last_line_once_file_stops_growing(app):
+    OfflineCheckpoint("testing").clear()
+    remote = RemoteFile(b"2|4|20220101120000")
+    report = sync_offline_base(remote, "testing", app.logger)
+    assert (report.accepted, report.rejected) == (0, 0)
+    report = sync_offline_base(remote, "testing", app.logger)
+    assert (report.accepted, report.rejected) == (1, 0)
+    assert sync_offline_base(remote, "testing", app.logger) is None
+    OfflineCheckpoint("testing").clear()
+
+
+def test_sync_offline_base_retries_failed_chunk(app, monkeypatch):
+    OfflineCheckpoint("testing").clear()
+    monkeypatch.setattr(environment_var, "OFFLINE_CHUNK_SIZE", 1)
+    bulk_insert = ingestion.bulk_insert
+    calls = []
+
+    def failing_bulk_insert(rows):
+        calls.append(rows)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        bulk_insert(rows)
+
+    monkeypatch.setattr(ingestion, "bulk_insert", failing_bulk_insert)
+    remote = RemoteFile(b"2|3|20220101120000\n2|4|20220101120000\n")
+    report = sync_offline_base(remote, "testing", app.logger)
+    assert (report.accepted, report.failed) == (1, 1)
+    assert OfflineCheckpoint("testing").load().offset == 19
+    report = sync_offline_base(remote, "testing", app.logger)
+    assert (report.accepted, report.duplicate, report.failed) == (1, 0, 0)
+    OfflineCheckpoint("testing").clear()
+
+
+def test_ingestion_survives_redis_error_after_commit(app, monkeypatch):
+    def invalidate_counts(*tables):
+        raise RedisError("Connection refused")
+
+    monkeypatch.setattr(ingestion, "invalidate_counts", invalidate_counts)
+    commits = []
+    report = ingest_lines(
+        ["2|3|20220101120000\n"], app.logger, on_commit=lambda: commits.append(1)
+    )
+    assert report.accepted == 1 and commits == [1]
+
+
+def test_sync_offline_base_gzip(app):
+    remote = RemoteFile(gzip.compress(b"2|3|20220101120000\n2|4|20220101120000"))
+    assert sync_offline_base(remote, "testing.gz", app.logger).accepted == 2
+
+
+def test_customer_products_cursor_pagination(authentication, client: FlaskClient):
+    data = client.get(
+        "/customer/1/product?cursor=&per_page=1",
+        headers=authentication,
+        follow_redirects=True,
+    ).get_json()["data"]
+    assert len(data["elements"]) == 1 and "nextCursor" in data
+
+
+def test_customer_batch_rejects_registered_cpf(
+    authentication, client: FlaskClient, customer_json
+):
+    cpf = Customer.query.get(1).cpf
+    batch = [customer_json, dict(customer_json, cpf=cpf)]
+    response = client.post(
+        "/customer/batch?mode=best-effort",
+        json=batch,
+        headers=authentication,
+        follow_redirects=True,
+    )
+    data = response.get_json()["data"]
+    assert data[1]["errors"] == {"cpf": ["CPF already registered"]}
+    assert Customer.query.filter(Customer.cpf == 11111111111).count() == 1
+
+
+def test_customer_products_export(authentication, client: FlaskClient):
+    response = client.get("/customer/1/product/export", headers=authentication)
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == AssocProductCustomer.query.filter_by(customer_id=1).count()
+
+
+def test_product_and_customer_information_eager_loaded(
+    authentication, client: FlaskClient
+):
+    client.get("/customer/1/product/1", headers=authentication)
+    response = client.get("/customer/1/product/1", headers=authentication)
+    assert response.get_json()["data"]["product"]["fullName"]
+    assert response.headers["X-Query-Count"] == "1"
+
+
+def test_loader_options_from_nested_fields():
+    options = loader_options(AssocProductCustomer, ProductCustomerSchema())
+    assert sorted(option.path[-1].key for option in options) == ["customer", "product"]
+
+
+@mark.parametrize(
+    "ClassSchema, data",
+    [
+        (ProductCustomerSchema, lambda: AssocProductCustomer.query.all()),
+        (CustomerSchema, lambda: Customer.query.all()),
+        (
+            CustomerListSchema,
+            lambda: {"elements": Customer.query.all(), "next_cursor": "abc"},
+        ),
+        (
+            ProductListSchema,
+            lambda: {"elements": Product.query.all(), "current_page": 1},
+        ),
+    ],
+)
+def test_compiled_schema_output_is_identical(app, ClassSchema, data):
+    data = data()
+    many = isinstance(data, list)
+    schema = compiled(ClassSchema)
+    assert schema.compiled
+    assert dumps(schema.dump(data, many=many)) == dumps(
+        ClassSchema().dump(data, many=many)
+    )
+
+
+def test_schema_with_hooks_is_not_compiled(app):
+    class HookedSchema(CustomerSchema):
+        @post_dump
+        def upper(self, data, **kwargs):
+            return {key: str(value).upper() for key, value in data.items()}
+
+    customer = Customer.query.first()
+    schema = compiled(HookedSchema)
+    assert not schema.compiled
+    assert schema.dump(customer) == HookedSchema().dump(customer)
+
+
+def test_compiled_nested_many_schema_with_hooks(app):
+    class TaggedSchema(CustomerSchema):
+        @post_dump
+        def tag(self, data, **kwargs):
+            return {**data, "tag": "customer"}
+
+    class OwnerSchema(Schema):
+        customers = fields.Nested(TaggedSchema(many=True))
+
+    data = {"customers": Customer.query.all()}
+    assert compiled(OwnerSchema).dump(data) == OwnerSchema().dump(data)
+
+
+def test_large_batch_response_is_streamed(
+    app, authentication, client: FlaskClient, customer_json
+):
+    size = app.config["JSON_STREAM_THRESHOLD"]
+    batch = [dict(customer_json, cpf=90000000000 + index) for index in range(size)]
+    response = client.post(
+        "/customer/batch?mode=best-effort",
+        json=batch,
+        headers=authentication,
+        follow_redirects=True,
+    )
+    assert "Content-Length" not in response.headers
+    assert len(response.get_json()["data"]) == size
@@ -0,0 +1,88 @@
+import logging
+import time
+
+from flask import Flask, g
+from flask.testing import FlaskClient
+from pytest import raises
+from sqlalchemy.exc import OperationalError
+
+from ipet.ext.db import db
+from ipet.ext.db.pool import configure_pool
+from ipet.ext.instrumentation.profiler import RequestProfile, start_profile
+
+
+def test_request_profile_keeps_slowest_statements():
+    profile = RequestProfile(slowest=2)
+    for duration, statement in ((1, "a"), (5, "b"), (3, "c")):
+        profile.add(statement, duration)
+    assert profile.count == 3 and profile.duration == 9
+    assert [statement for _, statement in profile.slowest] == ["b", "c"]
+
+
+def test_server_timing_header(authentication, client: FlaskClient):
+    response = client.get("/product/", headers=authentication)
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and "sql-1;dur=" in timing
+    assert int(response.headers["X-Query-Count"]) > 0
+
+
+def test_slow_statement_logged_with_plan(
+    app: Flask, authentication, client: FlaskClient, caplog
+):
+    app.config["SLOW_QUERY_MS"] = 0.000001
+    with caplog.at_level(logging.WARNING):
+        client.get("/product/1", headers=authentication)
+    slow = [record.message for record in caplog.records if "Slow" in record.message]
+    assert slow and any("SEARCH" in message for message in slow)
+
+
+def test_failed_statement_leaves_no_start_time(app: Flask):
+    with app.test_request_context(), db.engine.connect() as conn:
+        start_profile()
+        with raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM missing_table")
+        time.sleep(0.05)
+        conn.exec_driver_sql("SELECT 1")
+        assert not conn.info.get("statement_start")
+        assert g.sql_profile.count == 1 and g.sql_profile.duration < 50
+
+
+def test_sql_metrics_by_endpoint(authentication, client: FlaskClient):
+    client.get("/product/1", headers=authentication)
+    data = client.get("/metrics/sql", headers=authentication).get_json()["data"]
+    assert data["GET /product/<int:id>"]["requests"] == 1
+
+
+def test_prometheus_metrics(authentication, client: FlaskClient):
+    client.get("/product/1", headers=authentication)
+    response = client.get("/metrics")
+    body = response.get_data(as_text=True)
+    assert response.mimetype == "text/plain"
+    assert 'resource="ProductResource",status="200"' in body
+    assert "ipet_redis_command_duration_seconds_count" in body
+    assert "ipet_db_pool_wait_seconds_count" in body
+    assert 'ipet_serialization_duration_seconds_count{schema="ProductSchema"}' in body
+
+
+def test_pool_profile_options(app: Flask):
+    profiles = app.config["DB_POOL_PROFILES"]
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql+psycopg2://db/ipet"
+    app.config["DB_POOL_PROFILES"] = profiles
+    configure_pool(app, "worker")
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert options["pool_size"] == 2 and options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c lock_timeout=10000"}
+    app.config["DB_PGBOUNCER"] = True
+    configure_pool(app, "api")
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert options["pool_size"] == 5 and options["connect_args"] == {}
+    assert app.extensions["db_pool_profile"]["statement_timeout"] == 30000
+
+
+def test_pool_status(authentication, client: FlaskClient):
+    response = client.get("/metrics/pool", headers=authentication)
+    data = response.json["data"]
+    assert data["profile"] == "api" and data["pool"] == "TimedQueuePool"
+    assert data["checked_out"] >= 0 and data["checkout_wait"]["checkouts"] > 0
@@ -0,0 +1,113 @@
+import threading
+
+from flask_apscheduler import APScheduler
+
+from ipet.ext.db import db_redis
+from ipet.ext.libs import ssh
+from ipet.ext.libs.job_lock import JobLock, JobMetrics, JobStatus, exclusive_job
+from ipet.ext.libs.worker import Worker, live_workers
+
+
+def test_job_lock_is_exclusive(app):
+    lock = JobLock("testing", lease=5)
+    assert lock.acquire()
+    assert not JobLock("testing", lease=5).acquire()
+    lock.release()
+    other = JobLock("testing", lease=5)
+    assert other.acquire()
+    other.release()
+
+
+def test_job_metrics(app):
+    db_redis.delete(JobMetrics.KEY.format(job_id="testing"))
+    JobMetrics.incr("testing", "skipped")
+    JobMetrics.incr("testing", "skipped")
+    assert JobMetrics.get("testing") == {"skipped": 2}
+
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def is_authenticated(self):
+        return True
+
+    def send_ignore(self):
+        pass
+
+    def set_keepalive(self, interval):
+        self.keepalive = interval
+
+
+class FakeClient:
+    def __init__(self, *args):
+        self.transport = FakeTransport()
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.transport.active = False
+
+
+def test_ssh_pool_reuses_healthy_connection(monkeypatch):
+    monkeypatch.setattr(ssh, "create_ssh_client", FakeClient)
+    pool = ssh.SSHConnectionPool(keepalive=10)
+    client = pool.get("host", 22, "user", "password")
+    assert pool.get("host", 22, "user", "password") is client
+    assert client.get_transport().keepalive == 10
+
+
+def test_ssh_pool_reconnects_dead_connection(monkeypatch):
+    monkeypatch.setattr(ssh, "create_ssh_client", FakeClient)
+    pool = ssh.SSHConnectionPool()
+    client = pool.get("host", 22, "user", "password")
+    client.get_transport().active = False
+    assert pool.get("host", 22, "user", "password") is not client
+
+
+def test_exclusive_job_records_status(app):
+    scheduler = APScheduler()
+    scheduler.app = app
+
+    @exclusive_job(scheduler, "status_ok")
+    def succeeds():
+        return 1
+
+    @exclusive_job(scheduler, "status_error")
+    def fails():
+        raise ValueError("broken")
+
+    assert succeeds() == 1
+    assert fails() is None
+    status = JobStatus.all()
+    assert status["status_ok"]["state"] == "succeeded"
+    assert status["status_ok"]["counters"] == {"runs": 1}
+    assert status["status_error"]["state"] == "failed"
+    assert "broken" in status["status_error"]["error"]
+
+
+def test_worker_stops_gracefully(app):
+    scheduler = APScheduler()
+    scheduler.init_app(app)
+    runs = []
+    scheduler.add_job("testing", runs.append, args=[1], trigger="date")
+    worker = Worker(app, scheduler)
+    worker.beat()
+    assert list(live_workers()) == [worker.name]
+    threading.Timer(0.5, worker.stop).start()
+    worker.run()
+    assert runs == [1]
+    assert not scheduler.running
+    assert live_workers() == {}
+
+
+def test_job_status_resource(client, authentication):
+    JobStatus.update("testing", state="succeeded")
+    response = client.get("/metrics/jobs", headers=authentication)
+    assert response.status_code == 200
+    assert response.json["data"]["jobs"]["testing"]["state"] == "succeeded"
+    assert response.json["data"]["workers"] == {}
@@ -0,0 +1,53 @@
+import json
+import logging
+from queue import Queue
+from time import sleep
+
+from ipet.ext.log.handlers import DroppingQueueHandler, JSONFormatter, RateLimitFilter
+
+
+def make_record(
+    msg: str, level: int = logging.ERROR, lineno: int = 1
+) -> logging.LogRecord:
+    return logging.LogRecord("ipet", level, __file__, lineno, msg, None, None)
+
+
+def test_rate_limit_filter_samples_similar_messages():
+    rate_limit = RateLimitFilter(limit=2, window=60, sample=5)
+    passed = [
+        rate_limit.filter(make_record(f"Amount of invalid data: {id}|x|{id * 7}"))
+        for id in range(12)
+    ]
+    assert passed.count(True) == 4
+    assert rate_limit.filter(make_record("Another message", lineno=2))
+
+
+def test_rate_limit_filter_reports_suppressed_messages():
+    rate_limit = RateLimitFilter(limit=1, window=0.05, sample=0)
+    for id in range(3):
+        rate_limit.filter(make_record(f"ID not found: {id}"))
+    sleep(0.06)
+    record = make_record("ID not found: 4")
+    assert rate_limit.filter(record)
+    assert record.msg.endswith("(2 similar messages suppressed)")
+
+
+def test_rate_limit_filter_keeps_bounded_windows():
+    rate_limit = RateLimitFilter(limit=1, window=60, maxsize=3)
+    for lineno in range(1, 101):
+        rate_limit.filter(
+            make_record(f"Serialized data failure: {lineno}", lineno=lineno)
+        )
+    assert len(rate_limit._windows) == 3
+
+
+def test_json_formatter():
+    data = json.loads(JSONFormatter().format(make_record("Error saving")))
+    assert data["level"] == "ERROR" and data["message"] == "Error saving"
+
+
+def test_dropping_queue_handler_never_blocks():
+    handler = DroppingQueueHandler(Queue(1))
+    for msg in ("first", "second", "third"):
+        handler.handle(make_record(msg))
+    assert handler.queue.qsize() == 1 and handler.dropped == 2
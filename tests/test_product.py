@@ -1,7 +1,29 @@
-from http.client import CREATED, OK, UNAUTHORIZED
+import gzip
+from csv import DictReader
+from http.client import (
+    BAD_REQUEST,
+    CREATED,
+    MULTI_STATUS,
+    NOT_MODIFIED,
+    OK,
+    UNAUTHORIZED,
+)
+from json import dumps, loads
 
 from flask.testing import FlaskClient
-
+from pytest import mark, raises
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from werkzeug.exceptions import BadRequest
+
+from ipet.common.generics import resource
+from ipet.common.generics.resource import encode_cursor
+from ipet.ext.db import db, search
+from ipet.ext.db.cache import EntityCache
+from ipet.ext.db.constraints import create_unique_indexes, missing_unique_constraints
+from ipet.ext.db.counting import CACHED, count
+from ipet.ext.db.search import create_search_indexes, drop_search_indexes
+from ipet.ext.db.transaction import in_unit_of_work, unit_of_work
 from ipet.ext.product.models import Product
 
 
@@ -176,3 +198,315 @@ def test_authentication_obligation_in_delete_product(client: FlaskClient):
     assert (
         client.delete("/product/1", follow_redirects=True).status_code == UNAUTHORIZED
     )
+
+
+def test_product_cursor_pagination(authentication, client: FlaskClient):
+    names, cursor = [], ""
+    while cursor is not None:
+        data = client.get(
+            "/product",
+            query_string={"cursor": cursor, "per_page": 4},
+            headers=authentication,
+            follow_redirects=True,
+        ).get_json()["data"]
+        names += [element["fullName"] for element in data["elements"]]
+        cursor = data.get("nextCursor")
+    assert len(names) == Product.query.count() and "totalItems" not in data
+
+
+def test_product_cursor_pagination_with_count(authentication, client: FlaskClient):
+    data = client.get(
+        "/product?cursor=&withCount=true",
+        headers=authentication,
+        follow_redirects=True,
+    ).get_json()["data"]
+    assert data["totalItems"] == Product.query.count()
+
+
+def test_product_invalid_cursor(authentication, client: FlaskClient):
+    assert (
+        client.get(
+            "/product?cursor=invalid", headers=authentication, follow_redirects=True
+        ).status_code
+        == BAD_REQUEST
+    )
+
+
+@mark.parametrize("value", [None, {"id": 1}, [1], "1", 1.5, True])
+def test_product_cursor_of_wrong_type(authentication, client: FlaskClient, value):
+    response = client.get(
+        "/product",
+        query_string={"cursor": encode_cursor(value)},
+        headers=authentication,
+        follow_redirects=True,
+    )
+    assert response.status_code == BAD_REQUEST
+    assert response.get_json()["message"] == {"cursor": ["Invalid cursor"]}
+
+
+def test_product_pagination_count_strategy(authentication, client: FlaskClient):
+    data = client.get(
+        "/product", headers=authentication, follow_redirects=True
+    ).get_json()["data"]
+    assert data["countStrategy"] == "exact"
+
+
+def test_product_cached_count_invalidation(app):
+    query = Product.query.filter(Product.brand == "Vitarela")
+    total, strategy = count(query, CACHED)
+    Product(
+        full_name="Feijão",
+        full_description="Feijão preto",
+        brand="Vitarela",
+        price=9.5,
+    ).save()
+    assert strategy == CACHED and count(query, CACHED)[0] == total + 1
+
+
+def test_product_cached_count_invalidated_by_post(
+    app, authentication, client: FlaskClient, product_json
+):
+    app.config["PAGINATION_COUNT_STRATEGY"] = CACHED
+    try:
+        before = client.get(
+            "/product", headers=authentication, follow_redirects=True
+        ).get_json()["data"]
+        client.post("/product/", json=product_json, headers=authentication)
+        after = client.get(
+            "/product", headers=authentication, follow_redirects=True
+        ).get_json()["data"]
+    finally:
+        app.config["PAGINATION_COUNT_STRATEGY"] = "exact"
+    assert after["totalItems"] == before["totalItems"] + 1 == len(after["elements"])
+
+
+@mark.parametrize("backend", ["trigram", "fulltext"])
+def test_product_search_backend(app, authentication, client: FlaskClient, backend):
+    create_search_indexes(backend)
+    app.config["SEARCH_BACKEND"] = backend
+    try:
+        data = client.get(
+            "/product?full_name=macarr", headers=authentication, follow_redirects=True
+        ).get_json()["data"]
+    finally:
+        drop_search_indexes()
+    assert data["totalItems"] == 3
+
+
+def test_fulltext_search_matches_word_prefixes(
+    app, authentication, client: FlaskClient, monkeypatch
+):
+    create_search_indexes("fulltext")
+    app.config["SEARCH_BACKEND"] = "fulltext"
+    try:
+        data = client.get(
+            "/product?full_name=macarr integ",
+            headers=authentication,
+            follow_redirects=True,
+        ).get_json()["data"]
+    finally:
+        app.config["SEARCH_BACKEND"] = "ilike"
+        drop_search_indexes()
+    assert [element["fullName"] for element in data["elements"]] == [
+        "Macarrão integral"
+    ]
+    monkeypatch.setattr(search, "dialect", lambda: "postgresql")
+    clause = search.condition(Product.full_name, "macarr d'água", "fulltext")
+    compiled = clause.compile(dialect=postgresql.dialect())
+    assert "to_tsquery(" in str(compiled) and "plainto_tsquery" not in str(compiled)
+    assert "'macarr':* & 'd''água':*" in compiled.params.values()
+
+
+@mark.parametrize("backend", ["ilike", "fulltext"])
+def test_product_blank_search_term(app, authentication, client: FlaskClient, backend):
+    create_search_indexes(backend)
+    app.config["SEARCH_BACKEND"] = backend
+    try:
+        response = client.get(
+            "/product",
+            query_string={"full_name": "   ", "brand": " Vitarela "},
+            headers=authentication,
+            follow_redirects=True,
+        )
+    finally:
+        app.config["SEARCH_BACKEND"] = "ilike"
+        drop_search_indexes()
+    assert response.status_code == OK
+    data = response.get_json()["data"]
+    assert data["totalItems"] == Product.query.filter_by(brand="Vitarela").count()
+
+
+def test_product_by_id_not_modified(authentication, client: FlaskClient):
+    etag = client.get("/product/1", headers=authentication).headers["ETag"]
+    response = client.get(
+        "/product/1", headers={**authentication, "If-None-Match": etag}
+    )
+    assert response.status_code == NOT_MODIFIED
+
+
+def test_product_by_id_cache_hit(authentication, client: FlaskClient):
+    client.get("/product/1", headers=authentication)
+    client.get("/product/1", headers=authentication)
+    assert EntityCache.stats() == {"misses": 1, "hits": 1}
+
+
+def test_product_cache_skips_body_invalidated_during_read(
+    app, authentication, client: FlaskClient, monkeypatch
+):
+    read = resource.find_by_id
+
+    def read_then_concurrent_write(*args, **kwargs):
+        element = read(*args, **kwargs)
+        EntityCache.invalidate(Product, 1)
+        return element
+
+    monkeypatch.setattr(resource, "find_by_id", read_then_concurrent_write)
+    assert client.get("/product/1", headers=authentication).status_code == OK
+    assert EntityCache.get(Product, 1) is None
+    monkeypatch.setattr(resource, "find_by_id", read)
+    client.get("/product/1", headers=authentication)
+    assert EntityCache.get(Product, 1) is not None
+
+
+def test_product_cache_invalidation(authentication, client: FlaskClient, product_json):
+    client.get("/product/1", headers=authentication)
+    client.put("/product/1", json=product_json, headers=authentication)
+    json = client.get("/product/1", headers=authentication).get_json()
+    assert json["data"]["fullName"] == "Testing"
+
+
+def test_product_batch_create(authentication, client: FlaskClient, product_json):
+    batch = [product_json, dict(product_json, fullDescription="other")]
+    response = client.post(
+        "/product/batch", json=batch, headers=authentication, follow_redirects=True
+    )
+    assert response.status_code == CREATED
+    assert [item["status"] for item in response.get_json()["data"]] == [201, 201]
+    assert Product.query.filter(Product.full_name == "Testing").count() == 2
+
+
+def test_product_batch_atomic_rejects_duplicates(
+    authentication, client: FlaskClient, product_json
+):
+    response = client.post(
+        "/product/batch",
+        json=[product_json, product_json],
+        headers=authentication,
+        follow_redirects=True,
+    )
+    assert response.status_code == BAD_REQUEST
+    assert "1" in response.get_json()["message"]
+    assert Product.query.filter(Product.full_name == "Testing").count() == 0
+
+
+def test_product_batch_best_effort_ndjson(
+    authentication, client: FlaskClient, product_json
+):
+    lines = [product_json, {"fullName": "Invalid"}, product_json]
+    response = client.post(
+        "/product/batch?mode=best-effort",
+        data="\n".join(dumps(line) for line in lines),
+        content_type="application/x-ndjson",
+        headers=authentication,
+        follow_redirects=True,
+    )
+    assert response.status_code == MULTI_STATUS
+    assert [item["status"] for item in response.get_json()["data"]] == [201, 400, 400]
+    assert Product.query.filter(Product.full_name == "Testing").count() == 1
+
+
+def test_product_batch_update(authentication, client: FlaskClient):
+    batch = [{"id": 1, "brand": "batch"}, {"id": 2, "brand": "batch"}, {"id": 99}]
+    response = client.patch(
+        "/product/batch?mode=best-effort",
+        json=batch,
+        headers=authentication,
+        follow_redirects=True,
+    )
+    assert response.status_code == MULTI_STATUS
+    assert Product.query.filter(Product.brand == "batch").count() == 2
+
+
+def test_duplicated_product_creation(authentication, client: FlaskClient, product_json):
+    client.post("/product/", json=product_json, headers=authentication)
+    response = client.post("/product/", json=product_json, headers=authentication)
+    assert response.status_code == BAD_REQUEST
+    assert response.get_json()["message"] == {
+        "_schema": ["There is a product with that name and description"]
+    }
+    assert Product.query.filter(Product.full_name == "Testing").count() == 1
+
+
+def test_product_update_to_duplicated_values(
+    authentication, client: FlaskClient, product_json
+):
+    client.post("/product/", json=product_json, headers=authentication)
+    response = client.put("/product/1", json=product_json, headers=authentication)
+    assert response.status_code == BAD_REQUEST
+
+
+def test_product_export_ndjson(authentication, client: FlaskClient):
+    response = client.get("/product/export?full_name=Miojo", headers=authentication)
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.mimetype == "application/x-ndjson"
+    assert [loads(line)["fullName"] for line in lines] == ["Macarrão Miojo"]
+
+
+def test_product_export_csv_gzip(authentication, client: FlaskClient):
+    response = client.get(
+        "/product/export?format=csv",
+        headers={**authentication, "Accept-Encoding": "gzip"},
+    )
+    assert response.content_encoding == "gzip"
+    rows = list(DictReader(gzip.decompress(response.data).decode().splitlines()))
+    assert len(rows) == Product.query.count() and "fullName" in rows[0]
+
+
+def committed_names() -> set:
+    with db.engine.connect() as connection:
+        return {name for name, in connection.execute(select(Product.full_name))}
+
+
+def test_request_commits_once(authentication, client: FlaskClient, product_json):
+    response = client.post("/product/", headers=authentication, json=product_json)
+    assert response.status_code == CREATED
+    assert "Testing" in committed_names()
+    assert not in_unit_of_work()
+
+
+def test_unit_of_work_isolates_failed_writes(app):
+    with unit_of_work():
+        Product(full_name="Uow", full_description="a", price=1, brand="b").save()
+        with raises(BadRequest):
+            Product(full_name="Uow", full_description="a", price=1, brand="b").save()
+        assert "Uow" not in committed_names()
+    assert "Uow" in committed_names()
+
+
+def test_unit_of_work_rolls_back_on_error(app):
+    with raises(ValueError), unit_of_work():
+        Product(full_name="Lost", full_description="a", price=1, brand="b").save()
+        raise ValueError
+    assert "Lost" not in committed_names()
+
+
+def test_create_unique_indexes_on_existing_table(
+    app, authentication, client: FlaskClient, product_json
+):
+    db.session.execute(
+        "CREATE TABLE product_copy (id INTEGER PRIMARY KEY, full_name VARCHAR NOT NULL, "
+        "full_description VARCHAR NOT NULL, brand VARCHAR NOT NULL, "
+        "price FLOAT NOT NULL, created_at DATETIME NOT NULL)"
+    )
+    db.session.execute("INSERT INTO product_copy SELECT * FROM product")
+    db.session.execute("DROP TABLE product")
+    db.session.execute("ALTER TABLE product_copy RENAME TO product")
+    db.session.commit()
+    assert [constraint.name for constraint in missing_unique_constraints()] == [
+        "uq_product_full_name_description"
+    ]
+    assert create_unique_indexes() == ["uq_product_full_name_description"]
+    assert missing_unique_constraints() == []
+    client.post("/product/", json=product_json, headers=authentication)
+    response = client.post("/product/", json=product_json, headers=authentication)
+    assert response.status_code == BAD_REQUEST